@@ -0,0 +1,1280 @@
+# Conversion engine for the Affinity glyph converter in main.py.
+#
+# load_font() reads the cmap and GSUB tables of a unicode opentype font
+# for one language and returns them as a FontTables object.
+# convert_text() turns unicode text into the g+xxxx glyph string that
+# Affinity apps display after toggling to unicode, and decode_glyphs()
+# goes back from a glyph string to unicode for checking the output.
+#
+# The frozen copy of the original algorithm is in reference.py; fuzz.py
+# compares this engine against it, so run it after every change here.
+#
+
+import re
+import bisect
+import io
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+import types
+from fontTools.ttLib import TTFont
+import xml.etree.ElementTree as ET
+
+try:
+    import numpy
+except ImportError:  # the character pre-pass falls back to plain Python
+    numpy = None
+
+debug = False
+
+# character classes of the bulk pre-pass over the input text
+CLASS_OTHER = 0  # anything else, looked up in cmap
+CLASS_SCRIPT = 1  # inside uniRange of the language
+CLASS_LATIN = 2  # pass-through Latin letters, digits and punctuation
+CLASS_SPACE = 3  # space, ends a word
+CLASS_SEPARATOR = 4  # U+2008, U+2009 spaces, U+2028 line break, U+2029 para separator
+CLASS_CONTROL = 5  # below 31, like CR and LF, never starts reading a word
+
+# chars that get a fixed name instead of their cmap glyph
+SPECIAL_NAMES = {
+    0x0a: 'LFName',
+    0x0d: 'CRName',
+    0x20: 'SpaceName',
+    0x2008: 'SpaceName',
+    0x2009: 'SpaceName',
+    0x2028: 'LineBreak',  # line break actually
+    0x2029: 'ParaSeparator',  # para separator
+}
+
+# what the special names and the ZWNJ/ZWJ names are written as in the output
+SPECIAL_STRINGS = {
+    'LFName': "\n",
+    'CRName': "\r",
+    'ZWNJName': "",
+    'ZWJName': "",
+    'SpaceName': " ",
+    'LineBreak': "u+2028",
+    'ParaSeparator': "u+2029",
+}
+
+# per-language data, select one with the lang argument of load_font()
+# English is bypassed and so will also come.
+#
+# prepChar: single append preposition chars, like கெ கே கை
+# prep2Char: double append preposition chars, like கொ கோ கௌ
+# preapp2Char, post2Char: the pre-append and post-append chars they split into
+# uniRange: unicode range for the language
+# vowel, consonant, nukta, virama, matra, sign: char classes of the
+# syllables, used by fuzz.py to build random text
+#
+# Malayalam, Telugu and Kannada rely mostly on the GPOS engine to position
+# chars vertically, so they don't work correctly!
+LANGUAGES = {
+    "Tamil": {
+        "langID": "tml2",  # latest form of Tamil
+        "langID2": "taml",  # backup name if the first is not found
+        "prepChar": ["0xbc6", "0xbc7", "0xbc8"],
+        "prep2Char": ["0xbca", "0xbcb", "0xbcc"],
+        "preapp2Char": ["0xbc6", "0xbc7", "0xbc6"],
+        "post2Char": ["0xbbe", "0xbbe", "0xbd7"],
+        "uniRange": [0x0b80, 0x0bff],
+        "vowel": list(range(0x0b85, 0x0b95)),
+        "consonant": list(range(0x0b95, 0x0bba)),
+        "nukta": [],
+        "virama": [0x0bcd],
+        "matra": list(range(0x0bbe, 0x0bcd)) + [0x0bd7],
+        "sign": [0x0b82, 0x0b83],
+    },
+    "Deva": {
+        "langID": "dev2",
+        "langID2": "deva",
+        "prepChar": ["0x94e", "0x93f"],
+        "prep2Char": [],
+        "preapp2Char": [],
+        "post2Char": [],
+        "uniRange": [0x0900, 0x097f],
+        "vowel": list(range(0x0904, 0x0915)) + [0x0960, 0x0961],
+        "consonant": list(range(0x0915, 0x093a)) + list(range(0x0958, 0x0960)),
+        "nukta": [0x093c],
+        "virama": [0x094d],
+        "matra": list(range(0x093e, 0x094d)) + [0x0962, 0x0963],
+        "sign": [0x0901, 0x0902, 0x0903],
+    },
+    "Malay": {
+        "langID": "mlm2",
+        "langID2": "mlym",
+        "prepChar": ["0xd46", "0xd47", "0xd48"],
+        "prep2Char": ["0xd4a", "0xd4b", "0xd4c"],
+        "preapp2Char": ["0xd46", "0xd47", "0xd46"],
+        "post2Char": ["0xd3e", "0xd3e", "0xd57"],
+        "uniRange": [0x0d00, 0x0d7f],
+    },
+    "Telu": {
+        "langID": "tel2",
+        "langID2": "telu",
+        "prepChar": [],
+        "prep2Char": [],
+        "preapp2Char": [],
+        "post2Char": [],
+        "uniRange": [0x0c00, 0x0c7f],
+    },
+    "Kann": {
+        "langID": "knd2",
+        "langID2": "knda",
+        "prepChar": [],
+        "prep2Char": [],
+        "preapp2Char": [],
+        "post2Char": [],
+        "uniRange": [0x0c80, 0x0cff],
+    },
+}
+
+
+# everything read from the font that the conversion needs. load_font makes
+# it read-only when it is done, so one FontTables can be shared by many
+# threads converting at once. All the state of a conversion is kept in the
+# conversion functions.
+class FontTables:
+
+    def __init__(self, font, lang, fontFile="", fontNumber=0):
+        self.font = font  # the TTFont object
+        self.fontFile = fontFile
+        self.fontNumber = fontNumber
+        self.lang = lang  # key into LANGUAGES
+        self.uniRange = LANGUAGES[lang]["uniRange"]
+        self.llList = []  # GSUB lookup indices for the language, in order
+
+        self.substList = []  # final type 4 substitution data
+        self.subst1List = []  # final type 1 substitution data
+        self.subst1BTList = []  # final type 1 substitution data
+        # final type 6 LA and BT substitution data, one entry per chaining subtable is
+        # [input coverage index, lookahead or backtrack coverage index, record index,
+        # input glyphs, lookahead or backtrack glyphs, nested lookups at the rule glyph,
+        # [(sequence index, lookup index)], glyph -> out glyph of the nested lookups,
+        # input glyph -> components of the type 4 ligatures of the earlier lookups]
+        self.subst6List = []
+        self.subst6BTList = []
+        self.lookupSubst = {}  # nested lookup index -> {in: out} of its single substitutions
+        self.cmapList = []  # [unicode hex code, glyph name] from cmap
+        self.cmap = {}  # unicode code -> glyph name, last cmap entry wins
+        self.cmapCodes = None  # sorted cmap codes, numpy array
+        self.nameArray = None  # glyph names for glyph_name_index(), numpy object array
+
+        # names for CR, LF, space, ZWNJ and ZWJ in cmap
+        self.CRName = ""
+        self.LFName = ""
+        self.SpaceName = ""
+        self.ZWNJName = ""
+        self.ZWJName = ""
+
+        # glyph IDs of the pre-position/pre-base chars
+        self.prepglyID = [0] * len(LANGUAGES[lang]["prepChar"])
+        self.prep2glyID = [0] * len(LANGUAGES[lang]["prep2Char"])
+        self.preapp2glyID = [0] * len(LANGUAGES[lang]["preapp2Char"])
+        self.post2glyID = [0] * len(LANGUAGES[lang]["post2Char"])
+
+        # reverse tables for decode_glyphs()
+        self.glyphOrder = []  # glyph ID -> glyph name
+        self.revCmap = {}  # glyph name -> unicode char
+        self.revSubst1 = {}  # type 1 out glyph -> in glyph
+        self.revLigature = {}  # type 4 ligature glyph -> component glyph sequence
+        self.prepNames = set()
+        self.revPrep2 = {}  # (pre-append, post-append) glyph names -> two-part vowel glyph name
+
+        self.reachGlyphs = None  # glyph names a word can hold, see prune_rules()
+
+        # glyph name -> glyph ID, and the names of the pre-base and two-part
+        # vowel glyphs, so shaping never has to ask the TTFont
+        self.glyphIDs = {}
+        self.prepNameList = []
+        self.prep2NameList = []
+        self.preapp2NameList = []
+        self.post2NameList = []
+
+        # glyph string of every glyph name no rule can start on, see build_pass_table()
+        self.passNames = {}
+        self.passIndex = None  # numpy bool array along nameArray
+        self.passStrings = None  # numpy object array along nameArray
+
+        # coverage of the rules, glyph name -> indices of the rules it can
+        # start, in rule order, and the lookahead or backtrack glyphs of every
+        # LA and BT rule as a set, see build_coverage()
+        self.substIndex = {}
+        self.subst6Index = {}
+        self.subst6BTIndex = {}
+        self.subst6Context = ()
+        self.subst6BTContext = ()
+
+        self.frozen = False
+
+    def __setattr__(self, name, value):
+        if getattr(self, "frozen", False):
+            raise AttributeError("font tables are read-only after load_font, cannot set " + name)
+        object.__setattr__(self, name, value)
+
+
+# enter the language ttf font file, fontNumber selects the font in a .ttc collection
+# strip and save a temp xml file with only GSUB and cmap tables for the font
+# the conversion is faster, if the font .ttf or .ttc file contains
+# fewer number of glyphs with just one language.
+# xmlFile=None keeps the xml in memory instead of writing temp.xml
+# prune=False keeps the rules that can never fire
+def load_font(fontFile, lang="Deva", fontNumber=0, xmlFile="temp.xml", verbose=True, prune=True):
+
+    prepChar = LANGUAGES[lang]["prepChar"]
+    prep2Char = LANGUAGES[lang]["prep2Char"]
+    preapp2Char = LANGUAGES[lang]["preapp2Char"]
+    post2Char = LANGUAGES[lang]["post2Char"]
+
+    font2 = TTFont(fontFile, fontNumber=fontNumber)
+    ft = FontTables(font2, lang, fontFile, fontNumber)
+
+    if verbose:
+        print(font2.keys())
+
+    # check if GSUB is found
+    if 'GSUB' not in font2.keys():
+        raise ValueError("GSUB not found in font file " + str(fontFile))
+    if verbose:
+        print("GSUB found in the entered font file")
+
+    if xmlFile is None:
+        xmlFile = io.BytesIO()
+        font2.saveXML(xmlFile, tables=["GSUB", "cmap"])
+        xmlFile.seek(0)
+    else:
+        font2.saveXML(xmlFile, tables=["GSUB", "cmap"])
+
+    # read the xml one record at a time and free every record once it is
+    # read, so the whole tree is never in memory. ScriptList and FeatureList
+    # come before LookupList, so the lookups of the language are known when
+    # LookupList starts, and only those lookups are kept.
+    featlist = []  # list of features in GSUB
+    lookuplist = []  # list of lookup indices
+    llSet = None  # lookups of the language
+    ligatures = {}  # lookup index -> [glyph, components, ligature glyph]
+    contexts = {}  # lookup index -> coverage and record data of every subtable, see context_data()
+    substitutions = {}  # lookup index -> [in, out] of its Substitution entries, for nested lookups
+    k = 0
+    parents = []
+    for event, c in ET.iterparse(xmlFile, events=("start", "end")):
+        if event == "start":
+            if c.tag == 'LookupList':
+                llSet = set(select_lookups(ft, featlist, lookuplist, verbose))
+            parents.append(c)
+            continue
+        parents.pop()
+
+        if c.tag == 'ScriptRecord':
+            scriptrecord = c.get("index")
+            for d in c.iter('ScriptTag'):
+                scripttag = d.get("value")
+                for e in c.iter('FeatureIndex'):
+                    featindex = e.get("index")
+                    featvalue = e.get("value")
+                    featlist.append([scriptrecord, scripttag, featindex, featvalue])
+
+        elif c.tag == 'FeatureRecord':
+            featurerecordindex = c.get("index")
+            for d in c.iter('FeatureTag'):
+                featuretag = d.get("value")
+                for e in c.iter('LookupListIndex'):
+                    lookuplistindex = e.get("index")
+                    lookuplistval = e.get("value")
+                    lookuplist.append([featurerecordindex, featuretag, lookuplistindex, lookuplistval])
+
+        elif c.tag == 'Lookup':
+            subsetindex = c.get('index')
+            substitutions[subsetindex] = [[d.get('in'), d.get('out')] for d in c.iter('Substitution')]
+            if llSet is not None and subsetindex in llSet:
+                ligatures[subsetindex] = []
+                for d in c.iter('LigatureSet'):  # effectively search on for type 4 subst
+                    forglyph = (d.get('glyph'))  # for this glyph, with glyph ID
+                    for e in d.iter('Ligature'):
+                        ligatures[subsetindex].append([forglyph, str(e.get('components')), e.get('glyph')])
+                contexts[subsetindex] = [context_data(d) for d in c.iter('ChainContextSubst')]
+
+        elif c.tag == 'map':
+            # get mapped glyph names for unicode codes from cmap data
+            mapCode = str(c.get('code'))
+            glyphName = str(c.get('name'))
+            ft.cmapList.append([mapCode, glyphName])
+            ft.cmap[int(mapCode, 16)] = glyphName
+            k = k + 1
+
+        else:
+            continue
+        c.clear()
+        if parents:
+            parents[-1].remove(c)
+
+    if llSet is None:  # no LookupList
+        select_lookups(ft, featlist, lookuplist, verbose)
+    llList = ft.llList
+
+    # get char substitution type 4 list here, in lookup order
+    j = 0
+    for k2 in range(0, len(llList)):
+        for forglyph, substcomp, substglyph in ligatures.get(llList[k2], []):
+            ft.substList.append([forglyph, substcomp.split(","), substglyph])  # split if more than 1
+            j = j + 1
+
+    if verbose:
+        print("number of substitutions type 4 to be made =", j)
+
+    if debug:
+        print(ft.substList)
+
+    # get char substitution type 6 LA and BT lists here, in lookup order, one
+    # rule for every chaining subtable with lookahead or backtrack glyphs
+    for rules, contextName, name in [(ft.subst6List, 'LookAheadCoverage', "LA"),
+                                     (ft.subst6BTList, 'BacktrackCoverage', "BT")]:
+        for k2 in range(0, len(llList)):
+            earlier = earlier_ligatures(llList, llList[k2], ligatures)
+            for data in contexts.get(llList[k2], []):
+                if data[contextName][2] == 0:
+                    continue
+                records = data['records']
+                inputs = data['InputCoverage'][1]
+                rules.append([data['InputCoverage'][0], data[contextName][0], data['SubstLookupRecord'][0],
+                              inputs, data[contextName][1], rule_lookups(records), records, None,
+                              dict((g, tuple(earlier[g])) for g in inputs if g in earlier)])
+
+        if verbose:
+            print("number of", name, "substitutions type 6 to be made =", len(rules))
+        if debug:
+            print(rules)
+
+    # nested lookups of the LA and BT rules, lookup index -> {in: out} of its
+    # single substitutions, the first subtable with the glyph wins
+    for rule in ft.subst6List + ft.subst6BTList:
+        for seqIndex, lookupIndex in rule[6]:
+            if lookupIndex not in ft.lookupSubst:
+                ft.lookupSubst[lookupIndex] = single_substitutions(substitutions.get(str(lookupIndex), []))
+
+    # get char substitution LA and BT type 1 lists here
+    for rules, subst1, name in [(ft.subst6List, ft.subst1List, "LA"), (ft.subst6BTList, ft.subst1BTList, "BT")]:
+        for rule in rules:
+            for lookupIndex in rule[5] or []:
+                for inglyph, outglyph in ft.lookupSubst[lookupIndex].items():
+                    subst1.append([str(lookupIndex), inglyph, outglyph])
+        skipped = resolve_lookups(rules, ft)
+        if verbose:
+            print("number of", name, "substitutions type 1 to be made =", len(subst1))
+            print("number of", name, "rules that never change a glyph =", skipped)
+        if debug:
+            print(subst1)
+
+    if verbose:
+        print("total number of all glyphs in cmap=", k)
+
+    # find names for CR and LF names in cmap
+    for k in range(0, len(ft.cmapList)):
+        if ft.cmapList[k][0] == '0xa':
+            ft.CRName = ft.cmapList[k][1]
+        if ft.cmapList[k][0] == '0xd':
+            ft.LFName = ft.cmapList[k][1]
+        if ft.cmapList[k][0] == '0x20':
+            ft.SpaceName = ft.cmapList[k][1]
+        if ft.cmapList[k][0] == '0x200c':
+            ft.ZWNJName = ft.cmapList[k][1]
+        if ft.cmapList[k][0] == '0x200d':
+            ft.ZWJName = ft.cmapList[k][1]
+
+    # assume that they must be in the unicode fonts!
+    for l in range(0, len(prepChar)):
+        for ll in range(0, len(ft.cmapList)):
+            if prepChar[l] == ft.cmapList[ll][0]:
+                ft.prepglyID[l] = font2.getGlyphID(ft.cmapList[ll][1])
+                continue
+
+    if debug:
+        print("pre-position one char glyph IDs = ", ft.prepglyID)  # like கெ கே கை
+
+    for l in range(0, len(prep2Char)):
+        for ll in range(0, len(ft.cmapList)):
+            if prep2Char[l] == ft.cmapList[ll][0]:
+                ft.prep2glyID[l] = font2.getGlyphID(ft.cmapList[ll][1])
+                continue
+
+    if debug:
+        print("pre-position two char glyph IDs = ", ft.prep2glyID)  # கொ கோ கௌ
+
+    for l in range(0, len(preapp2Char)):
+        for ll in range(0, len(ft.cmapList)):
+            if preapp2Char[l] == ft.cmapList[ll][0]:
+                ft.preapp2glyID[l] = font2.getGlyphID(ft.cmapList[ll][1])
+                continue
+
+    if debug:
+        print("pre-append two char glyph IDs = ", ft.preapp2glyID)  # like the first glyph in after கௌ
+
+    for l in range(0, len(post2Char)):
+        for ll in range(0, len(ft.cmapList)):
+            if post2Char[l] == ft.cmapList[ll][0]:
+                ft.post2glyID[l] = font2.getGlyphID(ft.cmapList[ll][1])
+                continue
+
+    if debug:
+        print("post-append char glyph IDs = ", ft.post2glyID)  # like the third ள after கௌ
+
+    ft.glyphIDs = dict(font2.getReverseGlyphMap())
+    ft.prepNameList = [font2.getGlyphName(g) for g in ft.prepglyID]
+    ft.prep2NameList = [font2.getGlyphName(g) for g in ft.prep2glyID]
+    ft.preapp2NameList = [font2.getGlyphName(g) for g in ft.preapp2glyID]
+    ft.post2NameList = [font2.getGlyphName(g) for g in ft.post2glyID]
+
+    build_name_index(ft)
+    build_reverse_tables(ft)
+    if verbose:
+        print("reverse cmap, type 1 and type 4 entries =",
+              len(ft.revCmap), len(ft.revSubst1), len(ft.revLigature))
+
+    if prune:
+        prune_rules(ft, verbose)
+    build_coverage(ft)
+    build_pass_table(ft)
+    if verbose:
+        print("glyphs passed through without shaping =", len(ft.passNames))
+    freeze_tables(ft)
+
+    return ft
+
+
+# freeze all the tables, all the way down: lists become tuples, dicts
+# read-only views, sets frozensets and the arrays read-only, and the
+# attributes are locked, so nothing can change the tables once they are
+# shared. The TTFont itself is only read, for the names of glyphXXXXX glyphs.
+def freeze_tables(ft):
+    for name, value in list(vars(ft).items()):
+        if name != "font" and name != "frozen":
+            setattr(ft, name, frozen(value))
+    ft.frozen = True
+
+
+def frozen(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(frozen(v) for v in value)
+    if isinstance(value, (dict, types.MappingProxyType)):
+        return types.MappingProxyType(dict((k, frozen(v)) for k, v in value.items()))
+    if isinstance(value, (set, frozenset)):
+        return frozenset(value)
+    if numpy is not None and isinstance(value, numpy.ndarray):
+        value.setflags(write=False)
+    return value
+
+
+# the lookups of the language, in the order of its features, into ft.llList
+def select_lookups(ft, featlist, lookuplist, verbose=True):
+
+    langID = LANGUAGES[ft.lang]["langID"]
+    langID2 = LANGUAGES[ft.lang]["langID2"]
+
+    defaultLang1 = False
+    defaultLang2 = False
+
+    # check which version of tml2 or taml is present
+    # search whole list first
+    for j in range(0, len(featlist)):
+        if langID == featlist[j][1]:  # check first if tml2 is found
+            defaultLang1 = True
+        if langID2 == featlist[j][1]:  # check next if taml is found
+            defaultLang2 = True
+
+    lkList = []  # linked list
+    if defaultLang1:
+        for j in range(0, len(featlist)):
+            if langID == featlist[j][1]:  # check first if tml2 is found
+                lkList.append(featlist[j][3])
+                if verbose:
+                    print("default language found =", langID)
+
+    elif defaultLang2:
+        for j in range(0, len(featlist)):
+            if langID2 == featlist[j][1]:  # check if the other archaic form taml is found
+                lkList.append(featlist[j][3])
+                if verbose:
+                    print("language found is old", langID2)
+
+    if verbose:
+        print("Feature table index: lkList =", lkList)
+
+    # now get link list of lookup tables to use in correct order
+    llList = ft.llList
+    for k in range(0, len(lkList)):
+        for j in range(0, len(lookuplist)):
+            if (lookuplist[j][0]) == lkList[k]:
+                llList.append(lookuplist[j][3])
+                continue
+    if verbose:
+        print("Lookup table index: llList =", llList)
+
+    return llList
+
+
+# last index, glyphs and count of the coverages and records of a chaining subtable
+def context_data(c):
+    data = {}
+    for name in ['InputCoverage', 'SubstLookupRecord', 'LookAheadCoverage', 'BacktrackCoverage']:
+        lastIndex = None
+        glyphs = []
+        count = 0
+        for d in c.iter(name):
+            lastIndex = d.get('index')
+            count = count + 1
+            for e in d.iter('Glyph'):
+                glyphs.append(e.get('value'))
+        data[name] = [lastIndex, glyphs, count]
+    data['records'] = lookup_records(c)
+    return data
+
+
+# (sequence index, lookup index) of every SubstLookupRecord of a chaining subtable
+def lookup_records(subtable):
+    records = []
+    for d in subtable.iter('SubstLookupRecord'):
+        records.append((int(d.find('SequenceIndex').get('value')),
+                        int(d.find('LookupListIndex').get('value'))))
+    return records
+
+
+# shape_word substitutes only the glyph at the rule position, the first
+# input glyph, so a rule is used when all its nested lookups are at
+# sequence index 0, in record order. Rules with lookups on the other input
+# glyphs are kept in the records but never fire.
+def rule_lookups(records):
+    if not records or any(seqIndex != 0 for seqIndex, lookupIndex in records):
+        return None
+    return [lookupIndex for seqIndex, lookupIndex in records]
+
+
+# first glyph -> components of the type 4 ligatures of the lookups of the
+# language with a lower index than lookupIndex. The font applies its lookups
+# in lookup list order, whatever the order of the features.
+def earlier_ligatures(llList, lookupIndex, ligatures):
+    earlier = {}
+    for index in sorted(set(llList), key=int):
+        if int(index) >= int(lookupIndex):
+            break
+        for forglyph, substcomp, substglyph in ligatures.get(index, []):
+            earlier.setdefault(forglyph, []).append(tuple(substcomp.split(",")))
+    return earlier
+
+
+# {in: out} of the Substitution entries of a lookup, without the multiple
+# substitutions (out is a list of glyphs), shape_word puts one glyph back
+def single_substitutions(pairs):
+    subst = {}
+    for inglyph, outglyph in pairs:
+        if inglyph not in subst and outglyph is not None and "," not in outglyph:
+            subst[inglyph] = outglyph
+    return subst
+
+
+# set the out glyphs of every rule, for each input glyph what its nested
+# lookups make of it, one after the other. A rule that changes no glyph
+# never fires.
+def resolve_lookups(rules, ft):
+    skipped = 0
+    for rule in rules:
+        outs = {}
+        for glyph in rule[3]:
+            out = glyph
+            for lookupIndex in rule[5] or []:
+                out = ft.lookupSubst[lookupIndex].get(out, out)
+            if out != glyph:
+                outs[glyph] = out
+        rule[7] = outs or None
+        if rule[7] is None:
+            skipped = skipped + 1
+    return skipped
+
+
+# out glyph of an LA or BT rule for the glyph at charpos, None when its
+# nested lookups don't change that glyph. A type 4 ligature of an earlier
+# lookup that starts there takes the glyph first, so the rule doesn't fire.
+def nested_out(rule, wordname, charpos, ft):
+    if rule[7] is None:
+        return None
+    out = rule[7].get(wordname[charpos])
+    if out is not None:
+        for comps in rule[8].get(wordname[charpos], ()):
+            if ligature_match(comps, wordname, charpos, ft):
+                return None
+    return out
+
+
+# True when the components of a type 4 ligature follow charpos, the way
+# shape_word matches them, a ZWNJ after the glyph skips the middle one
+def ligature_match(comps, wordname, charpos, ft):
+    if len(comps) == 3 and wordname[charpos + 1] == ft.ZWNJName:
+        return comps[0] == wordname[charpos + 1] and comps[2] == wordname[charpos + 3]
+    return all(comps[n] == wordname[charpos + 1 + n] for n in range(len(comps)))
+
+
+# build reverse tables for decoding g+xxxx glyph strings back to unicode
+# first cmap entry wins, so a glyph maps back to its lowest unicode code
+def build_reverse_tables(ft):
+
+    font2 = ft.font
+    ft.glyphOrder = list(font2.getGlyphOrder())
+    for k in range(0, len(ft.cmapList)):
+        if ft.cmapList[k][1] not in ft.revCmap:
+            ft.revCmap[ft.cmapList[k][1]] = chr(int(ft.cmapList[k][0], 16))
+
+    for k in range(0, len(ft.subst1List)):
+        ft.revSubst1.setdefault(ft.subst1List[k][2], ft.subst1List[k][1])
+    for k in range(0, len(ft.subst1BTList)):
+        ft.revSubst1.setdefault(ft.subst1BTList[k][2], ft.subst1BTList[k][1])
+
+    for k in range(0, len(ft.substList)):
+        ft.revLigature.setdefault(ft.substList[k][2], [ft.substList[k][0]] + ft.substList[k][1])
+
+    ft.prepNames = frozenset(ft.prepNameList)
+    for l in range(0, len(ft.prep2NameList)):
+        ft.revPrep2[(ft.preapp2NameList[l], ft.post2NameList[l])] = ft.prep2NameList[l]
+
+
+# glyph names the shaper can ever see in a word, and the type 4, LA and BT
+# rules that can fire on them, found by running the rules on the reachable
+# set until nothing new comes out. Every char of the text is looked up in
+# cmap, so all cmap glyphs are seeds, not only the ones in uniRange.
+def reachable_glyphs(ft, seeds=None):
+
+    if seeds is None:
+        seeds = set(ft.cmap.values())
+    reach = set(seeds) | set(SPECIAL_NAMES.values())
+    reach.update(ft.preapp2NameList + ft.post2NameList)
+
+    grown = True
+    while grown:
+        grown = False
+        outs = []
+        for first, comps, out in ft.substList:
+            if ligature_live(first, comps, reach, ft):
+                outs.append(out)
+        for rule in ft.subst6List + ft.subst6BTList:
+            if rule[7] is not None and context_live(rule, reach):
+                outs.extend(rule[7][g] for g in rule[3] if g in reach and g in rule[7])
+        for g in outs:
+            if g not in reach:
+                reach.add(g)
+                grown = True
+    return reach
+
+
+def ligature_live(first, comps, reach, ft):
+    if first not in reach:
+        return False
+    if len(comps) == 3 and comps[0] == ft.ZWNJName:  # glyph after ZWNJ is not checked
+        return comps[0] in reach and comps[2] in reach
+    return all(c in reach for c in comps)
+
+
+def context_live(rule, reach):
+    if not any(g in reach for g in rule[3]) or not any(g in reach for g in rule[4]):
+        return False
+    if rule[0] == '0' and rule[1] == '0':
+        return True
+    if rule[0] == '1' and rule[1] == '0':  # second input glyph is checked by position
+        return len(rule[3]) < 2 or rule[3][1] in reach
+    return False  # other coverage counts are never matched
+
+
+# drop the rules that can never fire and the coverage glyphs that can never
+# be seen, so shape_word tests fewer rules at every position. The output is
+# the same as with the full rule set.
+def prune_rules(ft, verbose=True):
+
+    reach = reachable_glyphs(ft)
+    ft.reachGlyphs = reach
+    before = [len(ft.substList), len(ft.subst6List), len(ft.subst6BTList)]
+    glyphsBefore = sum(len(r[3]) + len(r[4]) for r in ft.subst6List + ft.subst6BTList)
+
+    ft.substList = [s for s in ft.substList if ligature_live(s[0], s[1], reach, ft)]
+    ft.subst6List = prune_context(ft.subst6List, reach)
+    ft.subst6BTList = prune_context(ft.subst6BTList, reach)
+
+    after = [len(ft.substList), len(ft.subst6List), len(ft.subst6BTList)]
+    glyphsAfter = sum(len(r[3]) + len(r[4]) for r in ft.subst6List + ft.subst6BTList)
+    if verbose:
+        print("reachable glyphs =", len(reach), "of", len(ft.font.getGlyphOrder()))
+        print("pruned type 4, LA and BT rules =", before, "->", after)
+        print("pruned LA and BT coverage glyphs =", glyphsBefore, "->", glyphsAfter)
+    return before, after
+
+
+def prune_context(rules, reach):
+    kept = []
+    for rule in rules:
+        if rule[7] is None or not context_live(rule, reach):
+            continue
+        if rule[0] == '1':  # keep the first two input glyphs in place
+            inputs = rule[3][:2] + [g for g in rule[3][2:] if g in reach]
+        else:
+            inputs = [g for g in rule[3] if g in reach]
+        lookahead = [g for g in rule[4] if g in reach]
+        kept.append([rule[0], rule[1], rule[2], inputs, lookahead, rule[5], rule[6], rule[7], rule[8]])
+    return kept
+
+
+# unicode values of the input chars, useful for debugging
+# the value of the last char is never shown, like in the original window
+def unicode_text(inputValue):
+
+    uniDisp = []
+    for c in inputValue[:-1]:
+        if ord(c) < 31:
+            uniDisp.append("\n")
+        else:
+            uniDisp.append(hex(ord(c)) + ",")
+    return "".join(uniDisp)
+
+
+def font_hash(fontFile):
+    with open(fontFile, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+# the main routine to convert unicode text to the final glyph string!
+# cache is an optional wordcache.WordCache, see convert_words()
+def convert_text(inputValue, ft, cache=None):
+    return "".join(glyphs for end, glyphs in convert_words(inputValue, ft, cache))
+
+
+# convert word by word, returns the end of every word in the text with its
+# glyph string. A word comes out the same wherever it is, so every word is
+# shaped only once per conversion, and the words found in the word cache
+# are copied from there. New words are stored in the cache for next time.
+def convert_words(inputValue, ft, cache=None):
+    if cache is None:
+        return shape_words(inputValue, ft, {})
+
+    classes = classify_text(text_codes(inputValue), ft)
+    words = set(inputValue[start:end] for start, end in word_bounds(classes))
+    known = cache.get_many(ft, words)
+    memo = dict(known)
+    finalDisp = shape_words(inputValue, ft, memo)
+    cache.put_many(ft, dict((word, memo[word]) for word in words if word not in known), known.keys())
+    return finalDisp
+
+
+# convert text that comes in pieces, like from a file or a pipe, and yield
+# the glyph string as it is produced. Only complete words (up to the last
+# space) are converted, the rest is carried over to the next chunk, so
+# memory stays at about one chunk plus the longest word.
+def convert_chunks(chunks, ft, cache=None):
+    carry = ""
+    seenText = False  # any char other than space and control so far
+    for chunk in chunks:
+        if not seenText and re.search("[^\x00-\x1e ]", chunk):
+            seenText = True
+        text = carry + chunk
+        cut = text.rfind(" ") + 1
+        if cut > 0:
+            yield convert_text(text[:cut], ft, cache)
+        carry = text[cut:]
+
+    # a last word of only control chars is dropped by shape_text when the
+    # whole text has nothing but spaces and control chars
+    if re.search("[^\x00-\x1e]", carry):
+        yield convert_text(carry, ft, cache)
+    elif carry and seenText:
+        yield shape_piece(carry, ft)
+
+
+# convert a text file or pipe to a glyph string file, chunk by chunk
+def convert_stream(infile, outfile, ft, chunkSize=65536, cache=None):
+
+    def read_chunks():
+        while True:
+            chunk = infile.read(chunkSize)
+            if not chunk:
+                break
+            yield chunk
+
+    for glyphs in convert_chunks(read_chunks(), ft, cache):
+        outfile.write(glyphs)
+
+
+# convert many texts at once with one shared FontTables in a thread pool,
+# for batch tools or a server. The results come back in the order of texts.
+def convert_many(texts, ft, workers=4, cache=None):
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda text: convert_text(text, ft, cache), texts))
+
+
+# shape_text reads one word per char position that is not a control char,
+# so a word made only of control chars after the last space may be dropped.
+# Inside a real text it always comes out. That only matters when the piece
+# has nothing but spaces and control chars, then shape it word by word and
+# convert control-only words the way they come out inside a word.
+def shape_piece(piece, ft):
+    if re.search("[^\x00-\x1e ]", piece):
+        return shape_text(piece, ft)  # nothing can be dropped, shape in one go
+    glyphs = ""
+    for word in re.findall("[^ ]* |[^ ]+$", piece):
+        if max(ord(c) for c in word) >= 31:
+            glyphs = glyphs + shape_text(word, ft)
+            continue
+        for c in word:
+            if ord(c) == 0x0a:
+                glyphs = glyphs + "\n"
+            elif ord(c) == 0x0d:
+                glyphs = glyphs + "\r"
+            elif ord(c) in ft.cmap:
+                glyphs = glyphs + "g+" + hex(ft.glyphIDs[ft.cmap[ord(c)]]).replace("0x", "")
+    return glyphs
+
+
+# arrays for looking up the glyph names of a whole text at once: index 0 is
+# no glyph, then the cmap names in code order, then the SPECIAL_NAMES
+def build_name_index(ft):
+    if numpy is None:
+        return
+    codes = sorted(ft.cmap)
+    specials = sorted(set(SPECIAL_NAMES.values()))
+    ft.cmapCodes = numpy.array(codes, dtype=numpy.uint32)
+    ft.nameArray = numpy.array([None] + [ft.cmap[c] for c in codes] + specials, dtype=object)
+    ft.specialIndex = {}
+    for code, name in SPECIAL_NAMES.items():
+        ft.specialIndex[code] = 1 + len(codes) + specials.index(name)
+
+
+# coverage tables for shape_word, so at every char it only looks at the
+# rules that can match it instead of comparing it with every glyph of every
+# rule. The LA and BT rules of other formats are left out, shape_word never
+# does anything with them.
+def build_coverage(ft):
+    ft.substIndex = coverage_index([[rule[0]] for rule in ft.substList])
+    ft.subst6Index = coverage_index([rule[3] if rule[0] in ('0', '1') and rule[1] == '0' else []
+                                     for rule in ft.subst6List])
+    ft.subst6BTIndex = coverage_index([rule[3] if rule[0] in ('0', '1') and rule[1] == '0' else []
+                                       for rule in ft.subst6BTList])
+    ft.subst6Context = tuple(frozenset(rule[4]) for rule in ft.subst6List)
+    ft.subst6BTContext = tuple(frozenset(rule[4]) for rule in ft.subst6BTList)
+
+
+# glyph name -> tuple of the indices of the glyph lists that have it
+def coverage_index(glyphLists):
+    index = {}
+    for i, glyphs in enumerate(glyphLists):
+        for name in glyphs:
+            rules = index.setdefault(name, [])
+            if not rules or rules[-1] != i:
+                rules.append(i)
+    return dict((name, tuple(rules)) for name, rules in index.items())
+
+
+# glyph strings of the glyph names that pass through shape_word unchanged.
+# A rule can only start on a type 4 first glyph, an LA or BT input glyph or
+# a pre-base or two-part vowel, so a word without any of them comes out one
+# glyph per char, the way the char append loop of shape_word writes it.
+def build_pass_table(ft):
+    starts = set(ft.prepNameList + ft.prep2NameList)
+    for first, comps, out in ft.substList:
+        starts.add(first)
+    for rule in ft.subst6List + ft.subst6BTList:
+        starts.update(rule[3])
+
+    names = [None] + list(SPECIAL_NAMES.values()) + list(ft.cmap.values())
+    ft.passNames = {}
+    for name in names:
+        if name not in starts and (name is None or name in SPECIAL_STRINGS or name in ft.glyphIDs):
+            ft.passNames[name] = glyph_string(name, ft)
+
+    if numpy is not None:
+        ft.passIndex = numpy.array([name in ft.passNames for name in ft.nameArray], dtype=bool)
+        ft.passStrings = numpy.array([ft.passNames.get(name, "") for name in ft.nameArray], dtype=object)
+
+
+def glyph_string(name, ft):
+    if name is None:
+        return ""
+    if name in SPECIAL_STRINGS:
+        return SPECIAL_STRINGS[name]
+    return "g+" + hex(ft.glyphIDs[name]).replace("0x", "")
+
+
+# True for every char outside uniRange whose glyph no rule can start on
+def pass_chars(classes, nameIdx, ft):
+    if numpy is None:
+        return [classes[i] != CLASS_SCRIPT and nameIdx[i] in ft.passNames for i in range(len(classes))]
+    return (classes != CLASS_SCRIPT) & ft.passIndex[nameIdx]
+
+
+# unicode codes of the text, a numpy array when numpy is there
+def text_codes(inputValue):
+    if numpy is None:
+        return [ord(c) for c in inputValue]
+    return numpy.frombuffer(inputValue.encode("utf-32-le", "surrogatepass"), dtype=numpy.uint32)
+
+
+# classify every char of the text at once, see CLASS_SCRIPT and friends
+def classify_text(codes, ft):
+    if numpy is None:
+        return [char_class(c, ft) for c in codes]
+    classes = numpy.full(len(codes), CLASS_OTHER, dtype=numpy.uint8)
+    classes[(codes > 0x20) & (codes < 0x250)] = CLASS_LATIN
+    classes[(codes >= ft.uniRange[0]) & (codes <= ft.uniRange[1])] = CLASS_SCRIPT
+    classes[codes == 0x20] = CLASS_SPACE
+    classes[(codes == 0x2008) | (codes == 0x2009) | (codes == 0x2028) | (codes == 0x2029)] = CLASS_SEPARATOR
+    classes[codes < 31] = CLASS_CONTROL
+    return classes
+
+
+def char_class(code, ft):
+    if code < 31:
+        return CLASS_CONTROL
+    if code == 0x20:
+        return CLASS_SPACE
+    if code == 0x2008 or code == 0x2009 or code == 0x2028 or code == 0x2029:
+        return CLASS_SEPARATOR
+    if ft.uniRange[0] <= code <= ft.uniRange[1]:
+        return CLASS_SCRIPT
+    if code < 0x250:
+        return CLASS_LATIN
+    return CLASS_OTHER
+
+
+# (start, end) of every word, a word ends after a space. Like the original
+# code, only as many words are read as there are chars that are not control.
+def word_bounds(classes):
+    if numpy is None:
+        ends = [i + 1 for i in range(0, len(classes)) if classes[i] == CLASS_SPACE]
+        wordCount = len([c for c in classes if c != CLASS_CONTROL])
+    else:
+        ends = (numpy.flatnonzero(classes == CLASS_SPACE) + 1).tolist()
+        wordCount = int(numpy.count_nonzero(classes != CLASS_CONTROL))
+    if not ends or ends[-1] != len(classes):
+        ends.append(len(classes))
+    starts = [0] + ends[:-1]
+    return list(zip(starts, ends))[:wordCount]
+
+
+# glyph name of every char as an index into ft.nameArray, or the names
+# themselves without numpy
+def glyph_name_index(codes, ft):
+    if numpy is None:
+        return [SPECIAL_NAMES.get(c, ft.cmap.get(c)) for c in codes]
+    if len(ft.cmapCodes) == 0:
+        return numpy.zeros(len(codes), dtype=numpy.intp)
+    idx = numpy.searchsorted(ft.cmapCodes, codes)
+    idx[idx >= len(ft.cmapCodes)] = 0
+    nameIdx = numpy.where(ft.cmapCodes[idx] == codes, idx + 1, 0)
+    for code, special in ft.specialIndex.items():
+        nameIdx[codes == code] = special
+    return nameIdx
+
+
+def word_names(nameIdx, start, end, ft):
+    if numpy is None:
+        return nameIdx[start:end]
+    return ft.nameArray[nameIdx[start:end]].tolist()
+
+
+# the shaping engine, reads the unicode text one word at a time, does all
+# the substitutions, and returns the final converted glyph string!
+def shape_text(inputValue, ft):
+    return "".join(glyphs for end, glyphs in shape_words(inputValue, ft))
+
+
+# shape_text word by word, the end of every word in the text with its glyph
+# string. With a memo, word -> glyph string, the words in it are copied
+# and the words shaped are added to it.
+def shape_words(inputValue, ft, memo=None):
+
+    # classify all chars and look up all glyph names in one pass
+    codes = text_codes(inputValue)
+    classes = classify_text(codes, ft)
+    nameIdx = glyph_name_index(codes, ft)
+
+    # words of only pass-through chars, like English text, skip shape_word
+    # and are written straight from the glyph string table
+    passing = pass_chars(classes, nameIdx, ft)
+    if numpy is None:
+        stopsBefore = [0]
+        for p in passing:
+            stopsBefore.append(stopsBefore[-1] + (not p))
+        charStrings = [ft.passNames.get(name, "") for name in nameIdx]
+    else:
+        stopsBefore = numpy.concatenate(([0], numpy.cumsum(~passing))).tolist()
+        charStrings = ft.passStrings[nameIdx].tolist()
+
+    finalDisp = []
+    for start, end in word_bounds(classes):
+        if memo is not None:
+            word = inputValue[start:end]
+            glyphs = memo.get(word)
+            if glyphs is not None:
+                finalDisp.append((end, glyphs))
+                continue
+        if stopsBefore[end] == stopsBefore[start]:
+            glyphs = "".join(charStrings[start:end])
+        else:
+            wordname = word_names(nameIdx, start, end, ft) + [None, None]  # pad extra spaces
+            if debug:
+                print("start, wordname =", start, wordname)
+            glyphs = shape_word(wordname, ft)
+        if memo is not None:
+            memo[word] = glyphs
+        finalDisp.append((end, glyphs))
+    return finalDisp
+
+
+# do all the substitutions on the glyph names of one word, and return its glyph string
+def shape_word(wordname, ft):
+
+    font2 = ft.font
+    glyphIDs = ft.glyphIDs
+    substList = ft.substList
+    subst6List = ft.subst6List
+    subst6BTList = ft.subst6BTList
+    prepNameList = ft.prepNameList
+    prep2NameList = ft.prep2NameList
+    preapp2NameList = ft.preapp2NameList
+    post2NameList = ft.post2NameList
+    ZWNJName = ft.ZWNJName
+    substIndex = ft.substIndex
+    subst6Index = ft.subst6Index
+    subst6BTIndex = ft.subst6BTIndex
+    subst6Context = ft.subst6Context
+    subst6BTContext = ft.subst6BTContext
+
+    finalDisp = ""
+    charAppend = ""  # char append variable
+
+    replace = 0
+    nextpos = 0
+    wordnamelen = len(wordname)
+
+    # swap first
+    for j2 in range(0, len(wordname) - 1):  # skip last one!
+        # now do swapping, if done all substitutions
+        for i4 in range(0, len(prepNameList)):
+            if wordname[j2 + 1] == prepNameList[i4]:
+                tempvalue = wordname[j2]
+                wordname[j2] = wordname[j2 + 1]
+                wordname[j2 + 1] = tempvalue
+                continue
+
+    for j2 in range(0, len(wordname) - 1):
+        # now do swapping, if done all substitutions
+        for i4 in range(0, len(prep2NameList)):
+            if wordname[j2 + 1] == prep2NameList[i4]:
+                if j2 - 1 < 0:  # if in 0th place insert there, otherwise normal
+                    wordname.insert(0, preapp2NameList[i4])
+                else:
+                    wordname.insert(j2, preapp2NameList[i4])
+                wordname[j2 + 2] = post2NameList[i4]
+                continue
+    if debug:
+        print("after all swapping done", wordname)
+
+    for ij in range(0, wordnamelen):
+        nextpos = 0
+        replace = 0
+        charpos = 0
+        substdone = False
+        for i2 in range(nextpos, wordnamelen):
+            charpos = i2 - replace  # current char pos in word
+
+            # LA substitution, with the rules whose input coverage has the char.
+            # A rule that fires changes the char, the next rules must match the new one.
+            rules = subst6Index.get(wordname[charpos], ())
+            k = 0
+            while k < len(rules):
+                i3 = rules[k]
+                k = k + 1
+                context = subst6Context[i3]
+                out = None
+                if subst6List[i3][0] == '0':
+                    if context and wordname[charpos + 1] in context:
+                        out = nested_out(subst6List[i3], wordname, charpos, ft)  # out glyph of the nested lookup
+                elif wordname[charpos + 1] == subst6List[i3][3][1]:  # two chars seq.
+                    if context and wordname[charpos + 2] in context:
+                        out = nested_out(subst6List[i3], wordname, charpos, ft)
+                if out is not None:
+                    wordname[charpos] = out
+                    substdone = True
+                    rules = subst6Index.get(wordname[charpos], ())
+                    k = bisect.bisect_right(rules, i3)
+
+            # BT substitution, the same with the glyphs before the char
+            rules = subst6BTIndex.get(wordname[charpos], ())
+            k = 0
+            while k < len(rules):
+                i3 = rules[k]
+                k = k + 1
+                context = subst6BTContext[i3]
+                out = None
+                if subst6BTList[i3][0] == '0':
+                    if context and wordname[charpos - 1] in context:
+                        out = nested_out(subst6BTList[i3], wordname, charpos, ft)  # out glyph of the nested lookup
+                elif wordname[charpos - 1] == subst6BTList[i3][3][1]:  # two chars seq.
+                    if context and wordname[charpos - 2] in context:
+                        out = nested_out(subst6BTList[i3], wordname, charpos, ft)
+                if out is not None:
+                    wordname[charpos] = out
+                    substdone = True
+                    rules = subst6BTIndex.get(wordname[charpos], ())
+                    k = bisect.bisect_right(rules, i3)
+
+            # type 4 subst 3, 2 and 1 components
+            for i3 in substIndex.get(wordname[charpos], ()):  # current char is in subst list
+                substComponent = substList[i3][1]
+                substValue = substList[i3][2]
+
+                if len(substComponent) == 3:  # first do double length subst
+                    if wordname[charpos + 1] == ZWNJName:
+                        if (substComponent[0] == wordname[charpos + 1]) and (
+                                substComponent[2] == wordname[charpos + 3]):
+                            wordname[charpos] = substValue
+                            del wordname[charpos + 1]  # delete that replaced char
+                            del wordname[charpos + 1]
+                            del wordname[charpos + 1]
+                            wordnamelen = wordnamelen - 3
+                            nextpos = charpos+1;  # we deleted one char, so nextpos is same
+                            replace = replace + 3
+                            substdone = True
+                            break  # break i3 loop
+
+                    else:  # if no ZWNJ, do these
+                         if (substComponent[0] == wordname[charpos+1]) and (substComponent[1]
+                            == wordname[charpos+2]) and (substComponent[2] == wordname[charpos+3]):
+                            wordname[charpos] = substValue
+                            del wordname[charpos+1]  # delete that replaced char
+                            del wordname[charpos+1]
+                            del wordname[charpos+1]
+                            wordnamelen = wordnamelen -3
+                            nextpos = charpos + 1;  # we deleted one char, so nextpos is +1
+                            replace = replace + 3
+                            substdone = True
+                            break  # break i3 loop
+
+                elif len(substComponent) == 2:  # first do double length subst
+                    if (substComponent[0] == wordname[charpos + 1]) and (
+                            substComponent[1] == wordname[charpos + 2]):
+                        wordname[charpos] = substValue
+                        del wordname[charpos + 1]  # delete that replaced char
+                        del wordname[charpos + 1]
+                        wordnamelen = wordnamelen - 2
+                        nextpos = charpos + 1;  # we deleted two char, so nextpos is +1
+                        replace = replace + 2
+                        substdone = True
+                        break  # break i3 loop
+
+                elif len(substComponent) == 1:  # first do single length subst
+                     if substComponent[0] == wordname[charpos+1]:
+                        wordname[charpos] = substValue
+                        del wordname[charpos + 1]  # delete that replaced char
+                        wordnamelen = wordnamelen -1
+                        nextpos = charpos + 1;  # we deleted one char, so nextpos is same
+                        replace = replace + 1
+                        substdone = True
+                        break   # break i3 loop
+
+        if debug:
+            print("iter no. ij, no. of substs., final wordname =", ij, replace, wordname)
+
+        if not substdone:
+               break  # break ij loop if no more subst required
+
+    for j3 in range(0, len(wordname)):
+        # now do char append
+        if wordname[j3] == None:
+            charAppend = ""
+        elif wordname[j3] == 'LFName':
+            charAppend = "\n"
+        elif wordname[j3] == 'CRName':
+            charAppend = "\r"
+        elif wordname[j3] == 'ZWNJName':
+            charAppend = ""
+        elif wordname[j3] == 'ZWJName':
+            charAppend = ""
+        elif wordname[j3] == 'SpaceName':
+            charAppend = " "
+        elif wordname[j3] == 'LineBreak':
+            charAppend = "u+2028"
+        elif wordname[j3] == 'ParaSeparator':
+            charAppend = "u+2029"
+        else:
+            wordID = glyphIDs.get(wordname[j3])
+            if wordID is None:  # glyphXXXXX names, or the KeyError for a bad name
+                wordID = font2.getGlyphID(wordname[j3])
+            charAppend = "g+" + (hex(wordID)).replace("0x", "")
+
+        finalDisp = finalDisp + charAppend
+
+    return finalDisp
+
+
+def expand_glyph(name, ft, memo, expanding=()):
+    # unwind type 1 and type 4 substitutions down to cmap glyphs, memoized
+    # so every glyph is expanded only once for the whole document
+    if name in memo:
+        return memo[name]
+    if name in ft.revCmap:
+        names = [name]
+    elif name in expanding:  # substitution cycle, give up on this glyph
+        return [name]
+    elif name in ft.revSubst1:
+        names = expand_glyph(ft.revSubst1[name], ft, memo, expanding + (name,))
+    elif name in ft.revLigature:
+        names = []
+        for comp in ft.revLigature[name]:
+            names = names + expand_glyph(comp, ft, memo, expanding + (name,))
+    else:
+        names = [name]  # unknown glyph, kept as is
+    memo[name] = names
+    return names
+
+
+def unswap_word(names, ft):
+    # undo the two-part vowel split and then the pre-base swap of shape_text
+    j2 = 0
+    out = []
+    while j2 < len(names):
+        if j2 + 2 < len(names) and (names[j2], names[j2 + 2]) in ft.revPrep2:
+            out.append(names[j2 + 1])
+            out.append(ft.revPrep2[(names[j2], names[j2 + 2])])
+            j2 = j2 + 3
+        else:
+            out.append(names[j2])
+            j2 = j2 + 1
+    for j2 in range(len(out) - 2, -1, -1):  # reverse order of the forward swaps
+        if out[j2] in ft.prepNames:
+            out[j2], out[j2 + 1] = out[j2 + 1], out[j2]
+    return out
+
+
+# decode a converted g+xxxx string back to unicode in a single pass
+# lossy substitutions (several inputs to one glyph) come back as the first input
+def decode_glyphs(glyphStr, ft):
+    textOut = []
+    wordNames = []
+    memo = {}  # glyph name -> cmap glyph names, for this decoding only
+
+    def flush_word():
+        for name in unswap_word(wordNames, ft):
+            if name in ft.revCmap:
+                textOut.append(ft.revCmap[name])
+            else:
+                textOut.append("g+" + hex(ft.glyphIDs[name]).replace("0x", ""))
+        del wordNames[:]
+
+    for m in re.finditer(r"g\+([0-9a-fA-F]+)|u\+(202[89])|(.)", glyphStr, re.S):
+        if m.group(1) is not None:
+            wordID = int(m.group(1), 16)
+            if wordID < len(ft.glyphOrder):
+                wordNames.extend(expand_glyph(ft.glyphOrder[wordID], ft, memo))
+            else:
+                flush_word()
+                textOut.append(m.group(0))
+        else:
+            flush_word()
+            if m.group(2) is not None:
+                textOut.append(chr(int(m.group(2), 16)))  # line break or para separator
+            else:
+                textOut.append(m.group(3))  # space, CR, LF pass through
+    flush_word()
+    return "".join(textOut)
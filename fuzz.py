@@ -0,0 +1,264 @@
+# Differential fuzz harness for the conversion engines.
+#
+# Generates random but valid Devanagari and Tamil syllable sequences and
+# compares the glyph output of the frozen reference algorithm in
+# reference.py with every engine in ENGINES, for every bundled font that
+# has the script in its GSUB table. The reference runs on the tables of the
+# frozen original loader, so the check covers load_font() as well as the
+# shaping. Any mismatch is shrunk to a minimal input before it is reported.
+#
+# Usage: python fuzz.py [--cases 200] [--seed 1] [--font akshar.ttf] [--threads 8] [--no-numpy]
+#
+# --no-numpy runs the engines on their plain Python code, the way they run
+# where numpy is not installed.
+#
+# --threads also runs a stress test: the random texts are converted and
+# decoded by many threads at once with one shared font, and every result
+# must equal the one of the same text converted alone.
+#
+# Run it after every change to the shaping code. A change that is meant to
+# alter the output (a bug fix) will show up here too, check those by hand.
+#
+
+import argparse
+import glob
+import random
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+import converter
+import reference
+import wordcache
+
+# all fonts shipped with the program, first font of a .ttc collection
+FONT_FILES = sorted(glob.glob("*.ttf") + glob.glob("*.ttc"))
+
+# streaming conversion, fed in small chunks so words are cut in the middle
+def stream_text(text, ft):
+    chunks = [text[i:i + 7] for i in range(0, len(text), 7)]
+    return "".join(converter.convert_chunks(chunks, ft))
+
+
+# word cache in a temporary file, every text is converted twice so the
+# second time it comes from the cache
+wordCache = None
+
+
+def cached_text(text, ft):
+    global wordCache
+    if wordCache is None:
+        wordCache = wordcache.WordCache(os.path.join(tempfile.mkdtemp(), "fuzz.db"))
+    first = converter.convert_text(text, ft, wordCache)
+    second = converter.convert_text(text, ft, wordCache)
+    return second if first == second else "cache changed the output: " + second
+
+
+# optimized engines to check against the reference, name -> function(text, ft)
+# converter shapes every distinct word of a text once
+ENGINES = {
+    "converter": converter.convert_text,
+    "shaper": converter.shape_text,
+    "stream": stream_text,
+    "cached": cached_text,
+}
+
+# languages with syllable data in converter.LANGUAGES
+FUZZ_LANGUAGES = ["Deva", "Tamil"]
+
+# words the original code already flags as fragile, always checked first
+FRAGILE_WORDS = {
+    "Deva": ["श्री", "र्जी", "दर्द", "अक्षय", "राजा", "रूपी", "क्षि", "द्धि"],
+    "Tamil": ["ஶ்ரீ", "ஸ்ரீ", "க்‌ஷ", "லக்‌ஷ்மி", "கொ", "கோ", "கௌ", "சித்து"],
+}
+
+SEPARATORS = [" ", " ", " ", ", ", "\n", " \n"]
+# with an astral char and a lone surrogate, both can come with pasted text
+LATIN_WORDS = ["mathi", "test", "Affinity", "A4", "(x)", "\U0001f600", "x\ud83d"]
+
+
+# keep only the chars the font can map
+def font_chars(ft, lang):
+    codes = set(int(c[0], 16) for c in ft.cmapList)
+    parts = {}
+    for part in ["vowel", "consonant", "nukta", "virama", "matra", "sign"]:
+        parts[part] = [chr(c) for c in converter.LANGUAGES[lang][part] if c in codes]
+    return parts
+
+
+# one orthographic syllable: vowel [sign] or (C [N] H){0,2} C [N] [matra] [sign]
+def random_syllable(rng, parts):
+    if parts["vowel"] and rng.random() < 0.15:
+        syl = rng.choice(parts["vowel"])
+    else:
+        syl = ""
+        for k in range(rng.choice([0, 0, 0, 1, 1, 2])):
+            syl = syl + rng.choice(parts["consonant"])
+            if parts["nukta"] and rng.random() < 0.1:
+                syl = syl + parts["nukta"][0]
+            syl = syl + parts["virama"][0]
+            if rng.random() < 0.05:
+                syl = syl + rng.choice(["\u200c", "\u200d"])  # ZWNJ or ZWJ
+        syl = syl + rng.choice(parts["consonant"])
+        if parts["nukta"] and rng.random() < 0.1:
+            syl = syl + parts["nukta"][0]
+        if parts["matra"] and rng.random() < 0.6:
+            syl = syl + rng.choice(parts["matra"])
+        elif rng.random() < 0.1:
+            syl = syl + parts["virama"][0]
+    if parts["sign"] and rng.random() < 0.15:
+        syl = syl + rng.choice(parts["sign"])
+    return syl
+
+
+# a random text as a list of units (syllables and separators), for shrinking
+def random_units(rng, parts):
+    units = []
+    for w in range(rng.randint(1, 4)):
+        if w > 0:
+            units.append(rng.choice(SEPARATORS))
+        if rng.random() < 0.1:
+            units.append(rng.choice(LATIN_WORDS))
+            continue
+        for s in range(rng.randint(1, 4)):
+            units.append(random_syllable(rng, parts))
+    return units
+
+
+# output of an engine, exceptions are part of the output
+def run_engine(engine, text, ft):
+    try:
+        return engine(text, ft)
+    except Exception as e:
+        return "error: " + type(e).__name__ + ": " + str(e)
+
+
+# the reference runs on refFt, the tables of reference.load_reference()
+def run_reference(text, refFt):
+    return run_engine(lambda t, f: reference.convert_reference(t, f)[0], text, refFt)
+
+
+def mismatch(text, ft, refFt, engine):
+    return run_reference(text, refFt) != run_engine(engine, text, ft)
+
+
+# shrink a failing unit list to a minimal failing text, first dropping
+# chunks of units, then single chars
+def shrink(units, ft, refFt, engine):
+    chunk = max(1, len(units) // 2)
+    while chunk >= 1:
+        i = 0
+        while i < len(units):
+            trial = units[:i] + units[i + chunk:]
+            if trial and mismatch("".join(trial), ft, refFt, engine):
+                units = trial
+            else:
+                i = i + chunk
+        chunk = chunk // 2
+
+    chars = list("".join(units))
+    i = 0
+    while i < len(chars):
+        trial = chars[:i] + chars[i + 1:]
+        if trial and mismatch("".join(trial), ft, refFt, engine):
+            chars = trial
+        else:
+            i = i + 1
+    return "".join(chars)
+
+
+def report(fontFile, lang, name, text, ft, refFt, engine):
+    print("MISMATCH", fontFile, lang, "engine =", name)
+    print("  input     =", repr(text), [hex(ord(c)) for c in text])
+    print("  reference =", repr(run_reference(text, refFt)))
+    print("  " + name, "=", repr(run_engine(engine, text, ft)))
+
+
+# convert and decode the texts again and again from many threads at once,
+# and compare with the results of one thread
+def stress_font(fontFile, lang, ft, texts, threads):
+    alone = [converter.convert_text(text, ft) for text in texts]
+    decoded = [converter.decode_glyphs(glyphs, ft) for glyphs in alone]
+
+    jobs = list(range(len(texts))) * 10
+    random.Random(len(jobs)).shuffle(jobs)
+    switch = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # switch threads as often as possible
+    try:
+        converted = converter.convert_many([texts[k] for k in jobs], ft, threads)
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            redecoded = list(pool.map(lambda k: converter.decode_glyphs(alone[k], ft), jobs))
+    finally:
+        sys.setswitchinterval(switch)
+
+    failures = 0
+    for n in range(len(jobs)):
+        if converted[n] != alone[jobs[n]] or redecoded[n] != decoded[jobs[n]]:
+            failures = failures + 1
+            if failures == 1:
+                print("THREAD MISMATCH", fontFile, lang, "input =", repr(texts[jobs[n]]))
+    print(fontFile, lang, "threads =", threads, "jobs =", len(jobs), "mismatches =", failures)
+    return failures
+
+
+def fuzz_font(fontFile, lang, cases, seed, engines, threads=0):
+    try:
+        ft = converter.load_font(fontFile, lang, xmlFile=None, verbose=False)
+        refFt = reference.load_reference(fontFile, lang)
+    except ValueError:
+        return 0
+    if not ft.llList:
+        return 0  # script not in this font
+
+    parts = font_chars(ft, lang)
+    if not parts["consonant"]:
+        return 0
+
+    rng = random.Random(seed)
+    failures = 0
+    for name, engine in engines.items():
+        found = set()
+        texts = [[w] for w in FRAGILE_WORDS[lang]]
+        texts = texts + [random_units(rng, parts) for n in range(cases)]
+        for units in texts:
+            if mismatch("".join(units), ft, refFt, engine):
+                small = shrink(units, ft, refFt, engine)
+                if small not in found:
+                    found.add(small)
+                    report(fontFile, lang, name, small, ft, refFt, engine)
+        print(fontFile, lang, name, "cases =", len(texts), "mismatches =", len(found))
+        failures = failures + len(found)
+
+    if threads:
+        texts = ["".join(random_units(rng, parts)) for n in range(cases)]
+        failures = failures + stress_font(fontFile, lang, ft, texts, threads)
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="compare conversion engines with the reference")
+    parser.add_argument("--cases", type=int, default=200, help="random texts per font and language")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--font", action="append", help="font file, default all bundled fonts")
+    parser.add_argument("--engine", action="append", help="engine name, default all")
+    parser.add_argument("--threads", type=int, default=0, help="also run the thread stress test")
+    parser.add_argument("--no-numpy", action="store_true", help="run the engines without numpy")
+    args = parser.parse_args()
+
+    if args.no_numpy:
+        converter.numpy = None
+
+    engines = ENGINES
+    if args.engine:
+        engines = dict((name, ENGINES[name]) for name in args.engine)
+
+    failures = 0
+    for fontFile in (args.font or FONT_FILES):
+        for lang in FUZZ_LANGUAGES:
+            failures = failures + fuzz_font(fontFile, lang, args.cases, args.seed, engines, args.threads)
+    print("total mismatches =", failures)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
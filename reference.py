@@ -0,0 +1,797 @@
+# Frozen reference copy of the original conversion algorithm, as it was
+# in retrieve_input() of main.py, and of the original loader that read the
+# GSUB and cmap tables with ET.parse. Do not optimize or fix bugs here!
+# fuzz.py compares the engines in converter.py against this copy, so any
+# change in output, including the known problems with chars like श्री,
+# र्जी and दर्द, shows up as a mismatch. The reference reads its tables
+# with load_reference(), never with converter.load_font(), so a change in
+# the tables the converter loads shows up too.
+#
+
+import io
+from fontTools.ttLib import TTFont
+import xml.etree.ElementTree as ET
+
+debug = False
+
+# the language data of the original main.py
+REF_LANGUAGES = {
+    "Tamil": {
+        "langID": "tml2",  # latest form of Tamil, skip the archaic form tml2
+        "langID2": "taml",  # backup name if the first is not found
+        "prepChar": ["0xbc6", "0xbc7", "0xbc8"],  # single append preposition chars list கெ கே கை
+        "prep2Char": ["0xbca", "0xbcb", "0xbcc"],  # double append preposition chars list கொ கோ கௌ
+        "preapp2Char": ["0xbc6", "0xbc7", "0xbc6"],  # pre-append chars
+        "post2Char": ["0xbbe", "0xbbe", "0xbd7"],  # post-append chars
+    },
+    "Deva": {
+        "langID": "dev2",
+        "langID2": "deva",
+        "prepChar": ["0x94e", "0x93f"],
+        "prep2Char": [],
+        "preapp2Char": [],
+        "post2Char": [],
+    },
+    "Malay": {
+        "langID": "mlm2",
+        "langID2": "mlym",
+        "prepChar": ["0xd46", "0xd47", "0xd48"],
+        "prep2Char": ["0xd4a", "0xd4b", "0xd4c"],
+        "preapp2Char": ["0xd46", "0xd47", "0xd46"],
+        "post2Char": ["0xd3e", "0xd3e", "0xd57"],
+    },
+    "Telu": {
+        "langID": "tel2",
+        "langID2": "telu",
+        "prepChar": [],
+        "prep2Char": [],
+        "preapp2Char": [],
+        "post2Char": [],
+    },
+    "Kann": {
+        "langID": "knd2",
+        "langID2": "knda",
+        "prepChar": [],
+        "prep2Char": [],
+        "preapp2Char": [],
+        "post2Char": [],
+    },
+}
+
+
+# the tables convert_reference() reads, as the original loader built them
+class ReferenceTables:
+
+    def __init__(self, font2):
+        self.font = font2
+        self.llList = []
+        self.substList = []
+        self.subst1List = []
+        self.subst1BTList = []
+        self.subst6List = []
+        self.subst6BTList = []
+        self.cmapList = []
+        self.prepglyID = []
+        self.prep2glyID = []
+        self.preapp2glyID = []
+        self.post2glyID = []
+        self.ZWNJName = ""
+
+
+# the original loader, keeps the xml in memory instead of writing temp.xml.
+# Raises ValueError when the font has no GSUB table, where the original quit.
+def load_reference(fontFile, lang="Deva", fontNumber=0):
+
+    langID = REF_LANGUAGES[lang]["langID"]
+    langID2 = REF_LANGUAGES[lang]["langID2"]
+    prepChar = REF_LANGUAGES[lang]["prepChar"]
+    prep2Char = REF_LANGUAGES[lang]["prep2Char"]
+    preapp2Char = REF_LANGUAGES[lang]["preapp2Char"]
+    post2Char = REF_LANGUAGES[lang]["post2Char"]
+    prepglyID = [0] * len(prepChar)  # pre-position glyph ID list initialization
+    prep2glyID = [0] * len(prep2Char)  # second pre-position glyph ID list initialization
+    preapp2glyID = [0] * len(preapp2Char)  # pre-append glyph ID list initialization
+    post2glyID = [0] * len(post2Char)  # post-append glyph ID list initialization
+    defaultLang1 = False
+    defaultLang2 = False
+
+    font2 = TTFont(fontFile, fontNumber=fontNumber)
+
+    # check if GSUB is found
+    GSUBfound = False
+    for c in font2.keys():
+        if c == 'GSUB':
+            GSUBfound = True
+
+    if not GSUBfound:
+        raise ValueError("GSUB not found in font file " + str(fontFile))
+
+    xmlFile = io.BytesIO()
+    font2.saveXML(xmlFile, tables=["GSUB", "cmap"])
+    xmlFile.seek(0)
+
+    # parse xml tree
+    tree = ET.parse(xmlFile)
+
+    # getting the parent tag of
+    # the xml document
+    root = tree.getroot()
+
+    # read other link and subst data from the xml font file
+    substList = []  # final type 4 substitution data
+    subst1List = []  # final type 1 substitution data
+    subst1BTList = []  # final type 1 substitution data
+    subst6List = []  # final type 6 LA substitution data
+    subst6BTList = []  # final type 6 BT substitution data
+
+    # first get feature list
+    featlist = []  # list of features in GSUB
+    for c in root.iter('ScriptRecord'):
+        scriptrecord = c.get("index")
+        for d in c.iter('ScriptTag'):
+            scripttag = d.get("value")
+            for e in c.iter('FeatureIndex'):
+                featindex = e.get("index")
+                featvalue = e.get("value")
+                featlist.append([scriptrecord, scripttag, featindex, featvalue])
+    #print(featlist)
+
+    lookuplist = []  # list of lookup indices
+    for c in root.iter('FeatureRecord'):
+        featurerecordindex = c.get("index")
+        for d in c.iter('FeatureTag'):
+            featuretag = d.get("value")
+            for e in c.iter('LookupListIndex'):
+                lookuplistindex = e.get("index")
+                lookuplistval = e.get("value")
+                lookuplist.append([featurerecordindex, featuretag, lookuplistindex, lookuplistval])
+    #print(lookuplist)
+
+    # check which version of tml2 or taml is present
+    # search whole list first
+    for j in range(0, len(featlist)):
+        if langID == featlist[j][1]:  # check first if tml2 is found
+            defaultLang1 = True
+        if langID2 == featlist[j][1]:  # check next if taml is found
+            defaultLang2 = True
+
+    # print(defaultLang1, defaultLang2)
+
+    lkList = []  # linked list
+    if defaultLang1:
+        # print("got to 1st language")
+        for j in range(0, len(featlist)):
+            if langID == featlist[j][1]:  # check first if tml2 is found
+                lkList.append(featlist[j][3])
+                if debug:
+                    print("default language found =", langID)
+        # else:
+        #     print('selected font file has other languages! =', featlist[j][1])
+        #     #quit()
+
+    elif defaultLang2:
+        # print("got to 2nd language")
+        for j in range(0, len(featlist)):
+            if langID2 == featlist[j][1]:  # check if the other archaic form taml is found
+                    lkList.append(featlist[j][3])
+                    if debug:
+                        print("language found is old", langID2)
+
+    if debug:
+        print("Feature table index: lkList =", lkList)
+
+    # now get link list of lookup tables to use in correct order
+    llList = []
+    for k in range(0, len(lkList)):
+        for j in range(0, len(lookuplist)):
+            if (lookuplist[j][0]) == lkList[k]:
+                llList.append(lookuplist[j][3])
+                continue
+    if debug:
+        print("Lookup table index: llList =", llList)
+
+    # get char substitution type 4 list here, easier to work with glyph ID, so get glyph ID
+    j = 0
+
+    for k in range(0, len(llList)):
+        for c in root.iter('Lookup'):
+            subsetindex = c.get('index')
+            if llList[k] == subsetindex:  # check in right order
+                for d in c.iter('LigatureSet'):  # effectively search on for type 4 subst
+                    forglyph = (d.get('glyph'))  # for this glyph, with glyph ID
+                    for e in d.iter('Ligature'):
+                        substcomp = str(e.get('components')).split(",")  # next component, split if more than 1
+                        for k in range(0, len(substcomp)):
+                            substcomp[k] = (substcomp[k])
+                        substglyph = (e.get('glyph'))
+                        substList.append([(forglyph),
+                                          (substcomp),(substglyph)])
+                        # if debug:
+                        #     if (forglyph == 'uni0940'):  # for debugging a particular char
+                        #         print("forglyph name= ", [(forglyph),
+                        #                       (substcomp),(substglyph)])
+
+                        j = j + 1
+                continue  # get substitute list in correct order
+
+    if debug:
+        print("number of substitutions type 4 to be made =", j)
+
+    if debug:
+        print(substList)
+
+    # get char substitution type 6 LA list here, easier to work with glyph ID, so get glyph ID
+    j = 0
+
+    for k in range(0, len(llList)):
+        for c in root.iter('Lookup'):
+            subset6index = c.get('index')
+            if llList[k] == subset6index:  # check in right order
+                temp1 = []
+                for d in c.iter('InputCoverage'):  # effectively search on for type 4 subst
+                    index1 = d.get('index')
+                for d in c.iter('SubstLookupRecord'):
+                    index2 = d.get('index')
+                for d in c.iter('LookAheadCoverage'):
+                    index3 = d.get('index')
+
+                for d in c.iter('InputCoverage'):  # effectively search on for type 4 subst
+                    for e in d.iter('Glyph'):  # effectively search on for type 4 subst
+                        inputglyph = (e.get('value'))  # for in glyph
+                        temp1.append(inputglyph)
+
+                temp2 = ""
+                for d in c.iter('SubstLookupRecord'):
+                    for e in d.iter('LookupListIndex'):
+                        looklistindex = (e.get('value'))
+                        temp2 = temp2+ looklistindex
+
+                temp3 = []
+                for d in c.iter('LookAheadCoverage'):
+                    for e in d.iter('Glyph'):
+                        lookaheadglyph = (e.get('value'))
+                        temp3.append(lookaheadglyph)
+
+                    subst6List.append([index1, index3, index2, temp1, temp3,temp2])
+                    #print([temp1, temp3, temp2])
+                    j = j + 1
+
+
+               # if debug:
+                #         if (inputglyph == 'uni093F'):  # for debugging a particular char
+                #             print("inglyph name= ", [inputglyph, temp, looklistindex])
+
+                continue  # get substitute list in correct order
+
+    if debug:
+        print("number of LA substitutions type 6 to be made =", j)
+    #print((subst6List))
+
+    if debug:
+        print(subst6List)
+
+    # get char substitution type 6 BT list here, easier to work with glyph ID, so get glyph ID
+    j = 0
+
+    for k in range(0, len(llList)):
+        for c in root.iter('Lookup'):
+            subset6BTindex = c.get('index')
+            if llList[k] == subset6BTindex:  # check in right order
+                tempBT1 = []
+                for d in c.iter('InputCoverage'):  # effectively search on for type 4 subst
+                    indexBT1 = d.get('index')
+                for d in c.iter('SubstLookupRecord'):
+                    indexBT2 = d.get('index')
+                for d in c.iter('BacktrackCoverage'):
+                    indexBT3 = d.get('index')
+
+                for d in c.iter('InputCoverage'):
+                    for e in d.iter('Glyph'):  # effectively search on for type 4 subst
+                        inputglyph = (e.get('value'))  # for in glyph
+                        tempBT1.append(inputglyph)
+
+                tempBT2 = ""
+                for d in c.iter('SubstLookupRecord'):
+                    for e in d.iter('LookupListIndex'):
+                        looklistBTindex = (e.get('value'))
+                        tempBT2 = tempBT2 + (looklistBTindex)
+
+                tempBT3 = []
+                for d in c.iter('BacktrackCoverage'):
+                    for e in d.iter('Glyph'):
+                        backtrackglyph = (e.get('value'))
+                        tempBT3.append(backtrackglyph)
+
+                    subst6BTList.append([indexBT1, indexBT3, indexBT2, tempBT1, tempBT3, tempBT2])
+                    j = j + 1
+
+                # if debug:
+                #         if (inputglyph == 'uni093F'):  # for debugging a particular char
+                #             print("inglyph name= ", [inputglyph, temp, looklistindex])
+                #     #
+
+                continue  # get substitute list in correct order
+
+    if debug:
+        print("number of BT substitutions type 6 to be made =", j)
+    #print((subst6BTList))
+
+    if debug:
+        print(subst6BTList)
+
+
+    # get char substitution LA type 1 list here, easier to work with glyph ID, so get glyph ID
+    j = 0
+
+    for k in range(0, len(subst6List)):
+        for c in root.iter('Lookup'):
+            subset6index = c.get('index')
+            if subst6List[k][5] == subset6index:  # check in right order
+                for d in c.iter('Substitution'):  # effectively search on for type 4 subst
+                    inglyph = (d.get('in'))  # for in glyph
+                    outglyph = (d.get('out'))  # for in glyph
+                    subst1List.append([subset6index, inglyph, outglyph])
+                    j = j + 1
+                    if debug:
+                        if (inglyph == 'uni0940'):  # for debugging a particular char
+                            print("inglyph name= ", [inglyph, outglyph])
+
+                continue  # get substitute list in correct order
+
+    if debug:
+        print("number of LA substitutions type 1 to be made =", j)
+    #print(subst1List)
+
+    if debug:
+        print(subst1List)
+
+    # get char substitution BT type 1 list here, easier to work with glyph ID, so get glyph ID
+    j = 0
+
+    for k in range(0, len(subst6BTList)):
+        for c in root.iter('Lookup'):
+            subset6BTindex = c.get('index')
+            if subst6BTList[k][5] == subset6BTindex:  # check in right order
+                for d in c.iter('Substitution'):  # effectively search on for type 4 subst
+                    inglyph = (d.get('in'))  # for in glyph
+                    outglyph = (d.get('out'))  # for in glyph
+                    subst1BTList.append([subset6BTindex, inglyph, outglyph])
+                    j = j + 1
+                    if debug:
+                        if (inglyph == 'uni0940'):  # for debugging a particular char
+                            print("inglyph name= ", [inglyph, outglyph])
+
+                continue  # get substitute list in correct order
+
+    if debug:
+        print("number of BT substitutions type 1 to be made =", j)
+    #print(subst1BTList)
+
+    if debug:
+        print(subst1BTList)
+
+    k = 0
+    cmapList = []
+    # get mapped glyph names for unicode codes from cmap data
+    for Map in root.iter('map'):
+        mapCode = str(Map.get('code'))
+        glyphName = str(Map.get('name'))
+        cmapList.append([mapCode, glyphName])
+        k = k + 1
+    if debug:
+        print("total number of all glyphs in cmap=", k)
+    #print(cmapList)
+
+    # find names for CR and LF names in cmap
+    CRName = ""
+    LFName = ""
+    SpaceName = ""
+    ZWNJName = ""
+    ZWJName = ""
+
+    for k in range(0, len(cmapList)):
+        if cmapList[k][0] == '0xa':
+            CRName = cmapList[k][1]
+        if cmapList[k][0] == '0xd':
+            LFName = cmapList[k][1]
+        if cmapList[k][0] == '0x20':
+            SpaceName = cmapList[k][1]
+        if cmapList[k][0] == '0x200c':
+            ZWNJName = cmapList[k][1]
+        if cmapList[k][0] == '0x200d':
+            ZWJName = cmapList[k][1]
+
+    #print("CR, LF names =", CRName, LFName)
+
+    # initialize some variables
+    l = 0
+    ll = 0
+
+    # assume that they must be in the unicode fonts!
+    for l in range(0, len(prepChar)):
+        for ll in range(0, len(cmapList)):
+            if prepChar[l] == cmapList[ll][0]:
+                prepglyID[l] = font2.getGlyphID(cmapList[ll][1])
+                continue
+
+    if debug:
+        print("pre-position one char glyph IDs = ", prepglyID)  # like கெ கே கை
+
+    # assume that they must be in the unicode fonts!
+    for l in range(0, len(prep2Char)):
+        for ll in range(0, len(cmapList)):
+            if prep2Char[l] == cmapList[ll][0]:
+                prep2glyID[l] = font2.getGlyphID(cmapList[ll][1])
+                continue
+
+    if debug:
+        print("pre-position two char glyph IDs = ", prep2glyID)  # கொ கோ கௌ
+
+    # assume that they must be in the unicode fonts!
+    for l in range(0, len(preapp2Char)):
+        for ll in range(0, len(cmapList)):
+            if preapp2Char[l] == cmapList[ll][0]:
+                preapp2glyID[l] = font2.getGlyphID(cmapList[ll][1])
+                continue
+
+    if debug:
+        print("pre-append two char glyph IDs = ", preapp2glyID)  # like the first glyph in after கௌ
+
+    # assume that they must be in the unicode fonts!
+    for l in range(0, len(post2Char)):
+        for ll in range(0, len(cmapList)):
+            if post2Char[l] == cmapList[ll][0]:
+                post2glyID[l] = font2.getGlyphID(cmapList[ll][1])
+                continue
+
+    if debug:
+        print("post-append char glyph IDs = ", post2glyID)  # like the third ள after கௌ
+
+
+    ft = ReferenceTables(font2)
+    ft.llList = llList
+    ft.substList = substList
+    ft.subst1List = subst1List
+    ft.subst1BTList = subst1BTList
+    ft.subst6List = subst6List
+    ft.subst6BTList = subst6BTList
+    ft.cmapList = cmapList
+    ft.prepglyID = prepglyID
+    ft.prep2glyID = prep2glyID
+    ft.preapp2glyID = preapp2glyID
+    ft.post2glyID = post2glyID
+    ft.ZWNJName = ZWNJName
+    return ft
+
+
+# returns the final glyph string and the unicode value display string
+def convert_reference(inputValue, ft):
+
+    font2 = ft.font
+    cmapList = ft.cmapList
+    substList = ft.substList
+    subst1List = ft.subst1List
+    subst1BTList = ft.subst1BTList
+    subst6List = ft.subst6List
+    subst6BTList = ft.subst6BTList
+    prepglyID = ft.prepglyID
+    prep2glyID = ft.prep2glyID
+    preapp2glyID = ft.preapp2glyID
+    post2glyID = ft.post2glyID
+    ZWNJName = ft.ZWNJName
+
+    finalDisp = ""  # initialize final display string in third window!
+    uniDisp = ""  # initialize unicode display string 2nd window!
+
+    #inputValue = inputValue  # pad extra 3 space for level 3
+
+    charAppend = ""  # char append variable in third window
+    uniAppend = ""  # unicode char append variable in 2nd window for debug
+
+    startpos = 0
+    word = ""
+
+    for ijk in range(startpos, len(inputValue)):  # for display unicode values in second window
+
+        uniDisp = uniDisp + uniAppend  # for displaying unicode string 2nd window
+        word = ""
+
+        uniAppend = hex(ord(inputValue[ijk]))+","
+        if ord(inputValue[ijk]) < 31:
+            uniAppend = "\n"
+            #charAppend = "\n"
+            continue
+
+        #read one word at a time by looking for space or CR
+
+        for ii in range(startpos, len(inputValue)):
+            word = word + (inputValue[ii])
+            startpos = ii+1
+            if ord(inputValue[ii]) == 32:  # include space and below for word end!
+                break  # break the above ii loop and continue
+
+            # if ord(inputValue[ii]) < 32:  # include space and below for word end!
+            #     word = word + "\r"
+            #     continue  # break the above ii loop and continue
+
+        # ignore empty spaces at the end of textbox
+        if word == "":
+            continue
+
+        if debug:
+            print("ijk, word =", ijk, word)
+
+        wordname = [None]*(len(word)+2)  # pad 1 extra space
+        # convert word to nameList
+        for i in range(0, len(cmapList)):
+            for i2 in range(0, len(word)):
+                # assume all these are CR returns
+                if ord(word[i2]) == 0x0a :
+                    wordname[i2] = 'LFName'
+                elif ord(word[i2]) == 0x0d :
+                    wordname[i2] = 'CRName'
+                elif ord(word[i2]) == 0x20:
+                    wordname[i2] = 'SpaceName'
+                elif ord(word[i2]) == 0x2008:
+                    wordname[i2] = 'SpaceName'
+                elif ord(word[i2]) == 0x2009:
+                    wordname[i2] = 'SpaceName'
+                elif ord(word[i2]) == 0x2028 :  # line break actually
+                    wordname[i2] = 'LineBreak'
+                elif ord(word[i2]) == 0x2029 :  # para separator
+                    wordname[i2] = 'ParaSeparator'
+                elif hex(ord(word[i2])) == cmapList[i][0]:
+                    wordname[i2] = (cmapList[i][1])
+                    continue
+
+        if debug:
+            print("ijk, wordname =", ijk, wordname)
+
+        replace = 0
+        nextpos = 0
+        wordnamelen = len(wordname)
+
+        # swap first
+        for j2 in range(0, len(wordname) - 1):  # skip last one!
+            # now do swapping, if done all substitutions
+            for i4 in range(0, len(prepglyID)):
+                if wordname[j2 + 1] == font2.getGlyphName(prepglyID[i4]):
+                    tempvalue = wordname[j2]
+                    wordname[j2] = wordname[j2 + 1]
+                    wordname[j2 + 1] = tempvalue
+                    continue
+
+        for j2 in range(0, len(wordname) - 1):
+            # now do swapping, if done all substitutions
+            for i4 in range(0, len(prep2glyID)):
+                if wordname[j2 + 1] == font2.getGlyphName(prep2glyID[i4]):
+                    if j2 - 1 < 0:  # if in 0th place insert there, otherwise normal
+                        wordname.insert(0, font2.getGlyphName(preapp2glyID[i4]))
+                    else:
+                        wordname.insert(j2, font2.getGlyphName(preapp2glyID[i4]))
+                    wordname[j2 + 2] = font2.getGlyphName(post2glyID[i4])
+                    continue
+        if debug:
+            print("after all swapping done", wordname)
+
+        for ij in range(0, wordnamelen):
+            nextpos = 0
+            replace = 0
+            charpos = 0
+            substdone = False
+            for i2 in range(nextpos, wordnamelen):
+                charpos = i2 - replace  # current char pos in word
+
+                # LA substitution
+                for i3 in range(0, len(subst6List)):
+                    # print("subst6 ", wordname[charpos], subst6List[i3][0][0])
+                    for i4 in range(0, len(subst6List[i3][3])):
+                        if wordname[charpos] == subst6List[i3][3][i4]:
+                            # print("before subst6 ", len(subst6List[i3][4]), wordname[charpos], subst6List[i3][3][0])
+                            if subst6List[i3][0] == '0' and subst6List[i3][1] == '0':
+                                #print("before subst6 ", len(subst6List[i3][4]), wordname[charpos], subst6List[i3][3][0])
+                                for j3 in range(0, len(subst6List[i3][4])):
+                                    if wordname[charpos + 1] == subst6List[i3][4][j3]:
+                                        if debug:
+                                            print("after subst6 0 0 ", (subst6List[i3][4][j3]), wordname[charpos + 1],
+                                                  subst6List[i3][5])
+                                        for k3 in range(0, len(subst1List)):
+                                            if subst6List[i3][5] == subst1List[k3][0]:
+                                                if debug:
+                                                    print("final before LA 0 0", wordname[charpos], subst1List[k3][0],
+                                                          subst1List[k3][2])
+                                                wordname[charpos] = subst1List[k3][2]
+                                                if debug:
+                                                    print("final after LA 0 0", wordname[charpos], subst1List[k3][0],
+                                                          subst1List[k3][2])
+                                                    print("final LA 0 0", word, wordname)
+
+                                                substdone = True
+                                                continue
+
+                            if subst6List[i3][0] == '1' and subst6List[i3][1] == '0':
+                                # print("2 seq. before subst6 ", len(subst6List[i3][4]), wordname[charpos],
+                                #       subst6List[i3][3][0])
+                                if wordname[charpos + 1] == subst6List[i3][3][1]:  # two chars seq.
+                                    # print("2 seq. before subst6 ", len(subst6List[i3][4]), wordname[charpos],
+                                    #       subst6List[i3][3][0])
+                                    for j3 in range(0, len(subst6List[i3][4])):
+                                        if wordname[charpos + 2] == subst6List[i3][4][j3]:
+                                            if debug:
+                                                print("after subst6 1 0 ", (subst6List[i3][4][j3]),
+                                                       wordname[charpos + 1], subst6List[i3][5])
+                                            for k3 in range(0, len(subst1List)):
+                                                if subst6List[i3][5] == subst1List[k3][0]:
+                                                    if debug:
+                                                        print("final LA 1 0 before", wordname[charpos], subst1List[k3][0],
+                                                              subst1List[k3][2])
+                                                    wordname[charpos] = subst1List[k3][2]
+                                                    if debug:
+                                                        print("final LA 1 0 after", wordname[charpos], subst1List[k3][0],
+                                                              subst1List[k3][2])
+                                                        print("final LA 1 0", word, wordname)
+
+                                                    substdone = True
+                                                    continue
+
+                # BT substitution
+                for i3 in range(0, len(subst6BTList)):
+                    # print("subst6 ", wordname[charpos], subst6List[i3][0][0])
+                    for i4 in range(0, len(subst6BTList[i3][3])):
+                        if wordname[charpos] == subst6BTList[i3][3][i4]:
+                            # print("before subst6 ", len(subst6List[i3][4]), wordname[charpos], subst6List[i3][3][0])
+                            if subst6BTList[i3][0] == '0' and subst6BTList[i3][1] == '0':
+                                # print("before subst6 ", len(subst6List[i3][4]), wordname[charpos], subst6List[i3][3][0])
+                                for j3 in range(0, len(subst6BTList[i3][4])):
+                                    if wordname[charpos - 1] == subst6BTList[i3][4][j3]:
+                                        if debug:
+                                            print("after subst6BT 0 0 ", (subst6BTList[i3][4][j3]),
+                                                  wordname[charpos - 1], subst6BTList[i3][5])
+                                        for k3 in range(0, len(subst1BTList)):
+                                            if subst6BTList[i3][5] == subst1BTList[k3][0]:
+                                                if debug:
+                                                    print("final BT  0 0 before", wordname[charpos], subst1BTList[k3][0],
+                                                          subst1BTList[k3][2])
+                                                wordname[charpos] = subst1BTList[k3][2]
+                                                if debug:
+                                                    print("final BT 0 0 after", wordname[charpos], subst1BTList[k3][0],
+                                                          subst1BTList[k3][2])
+                                                    print("final BT 0 0", word, wordname)
+
+                                                substdone = True
+                                                continue
+
+                            if subst6BTList[i3][0] == '1' and subst6BTList[i3][1] == '0':
+                                # print("2 seq. before subst6BT ", len(subst6BTList[i3][4]), wordname[charpos],
+                                #       subst6BTList[i3][3][0])
+                                if wordname[charpos - 1] == subst6BTList[i3][3][1]:  # two chars seq.
+                                    # print("2 seq. before subst6BT ", len(subst6BTList[i3][4]),
+                                    #       wordname[charpos], subst6BTList[i3][3][0])
+                                    for j3 in range(0, len(subst6BTList[i3][4])):
+                                        if wordname[charpos - 2] == subst6BTList[i3][4][j3]:
+                                            if debug:
+                                                print("after subst6 1 0 ", (subst6BTList[i3][4][j3]),
+                                                      wordname[charpos - 2], subst6BTList[i3][5])
+                                            for k3 in range(0, len(subst1BTList)):
+                                                if subst6BTList[i3][5] == subst1BTList[k3][0]:
+                                                    if debug:
+                                                        print("final BT 1 0 before", wordname[charpos],
+                                                              subst1BTList[k3][0], subst1BTList[k3][2])
+                                                    wordname[charpos] = subst1BTList[k3][2]
+                                                    if debug:
+                                                        print("final BT 1 0 after", wordname[charpos],
+                                                              subst1BTList[k3][0], subst1BTList[k3][2])
+                                                        print("final BT 1 0", word, wordname)
+
+                                                    substdone = True
+                                                    continue
+
+                # type 4 subst 3, 2 and 1 components
+                for i3 in range(0, len(substList)):
+                    if wordname[charpos] == substList[i3][0]:  #current char is in subst list
+                        substword = wordname[charpos]
+                        substComponent = substList[i3][1]
+                        substValue = substList[i3][2]
+
+                        if len(substComponent) == 3:  # first do double length subst
+                            if wordname[charpos + 1] == ZWNJName:
+                                if (substComponent[0] == wordname[charpos + 1]) and (
+                                        substComponent[2] == wordname[charpos + 3]):
+                                    #print("got to level 3 with zwj")
+                                    wordname[charpos] = substValue
+                                    del wordname[charpos + 1]  # delete that replaced char
+                                    del wordname[charpos + 1]
+                                    del wordname[charpos + 1]
+                                    wordnamelen = wordnamelen - 3
+                                    nextpos = charpos+1;  # we deleted one char, so nextpos is same
+                                    replace = replace + 3
+                                    substdone = True
+                                    if debug:
+                                        print("aft L3zwnj ij, charpos, nextpos, rep, len, new wordname", ij, charpos, nextpos,
+                                              replace, wordnamelen, word[charpos],
+                                              word[charpos + 1], word[charpos + 2], substword, substComponent, substValue)
+                                    break  # break i3 loop
+
+                            else:  # if no ZWNJ, do these
+                                 if (substComponent[0] == wordname[charpos+1]) and (substComponent[1]
+                                    == wordname[charpos+2]) and (substComponent[2] == wordname[charpos+3]):
+                                    #print("got to level 3")
+                                    wordname[charpos] = substValue
+                                    del wordname[charpos+1]  # delete that replaced char
+                                    del wordname[charpos+1]
+                                    del wordname[charpos+1]
+                                    wordnamelen = wordnamelen -3
+                                    nextpos = charpos + 1;  # we deleted one char, so nextpos is +1
+                                    replace = replace + 3
+                                    substdone = True
+                                    if debug:
+                                        print("aft L3 ij, charpos, nextpos, rep, len, new wordname", ij, charpos, nextpos, replace, wordnamelen, word[charpos],
+                                              word[charpos + 1], word[charpos+2], substword, substComponent, substValue)
+                                    break  # break i3 loop
+
+                        elif len(substComponent) == 2:  # first do double length subst
+                            if (substComponent[0] == wordname[charpos + 1]) and (
+                                    substComponent[1] == wordname[charpos + 2]):
+                                #print("got to level 2")
+                                wordname[charpos] = substValue
+                                del wordname[charpos + 1]  # delete that replaced char
+                                del wordname[charpos + 1]
+                                wordnamelen = wordnamelen - 2
+                                nextpos = charpos + 1;  # we deleted two char, so nextpos is +1
+                                replace = replace + 2
+                                substdone = True
+                                if debug:
+                                    print("aft L2 ij, charpos, nextpos, rep, len, new wordname", ij, charpos, nextpos,
+                                          replace, wordnamelen, word[charpos],
+                                          word[charpos + 1], word[charpos + 2], substword, substComponent, substValue)
+                                break  # break i3 loop
+
+                        elif len(substComponent) == 1:  # first do single length subst
+                             if substComponent[0] == wordname[charpos+1]:
+                                #print("got to level 1")
+                                wordname[charpos] = substValue
+                                del wordname[charpos + 1]  # delete that replaced char
+                                wordnamelen = wordnamelen -1
+                                nextpos = charpos + 1;  # we deleted one char, so nextpos is same
+                                replace = replace + 1
+                                substdone = True
+                                if debug:
+                                    print("aft L1 ij, charpos, nextpos, rep, len, new wordname", ij, charpos, nextpos, replace, wordnamelen, word[charpos],
+                                           word[charpos + 1], substword, substComponent, substValue)
+                                break   # break i3 loop
+
+            if debug:
+                print("iter no. ij, no. of substs., final wordname =", ij, replace, wordname)
+            # if (charpos+replace) > wordnamelen-1:  # recheck logic here!
+            #     break
+
+            if not substdone:
+                   break  # break ij loop if no more subst required
+
+
+        for j3 in range(0, len(wordname)):
+            # now do char append
+            if wordname[j3] == None:
+                charAppend = ""
+                #continue
+            elif wordname[j3] == 'LFName':
+                charAppend = "\n"
+            elif wordname[j3] == 'CRName':
+                charAppend = "\r"
+            elif wordname[j3] == 'ZWNJName':
+                charAppend = ""
+            elif wordname[j3] == 'ZWJName':
+                charAppend = ""
+            elif wordname[j3] == 'SpaceName':
+                charAppend = " "
+            elif wordname[j3] == 'LineBreak':
+                charAppend = "u+2028"
+            elif wordname[j3] == 'ParaSeparator':
+                charAppend = "u+2029"
+            else:
+                wordID = (font2.getGlyphID(wordname[j3]))
+                charAppend = "g+" + (hex(wordID)).replace("0x", "")
+
+            finalDisp = finalDisp + charAppend
+
+    return finalDisp, uniDisp
@@ -0,0 +1,61 @@
+# Command line conversion of large documents, without the window.
+#
+# Reads unicode text from a file or a pipe a chunk at a time, converts it
+# word by word and writes the glyph string as it is produced, so even
+# book-length manuscripts convert in constant memory.
+#
+# Usage: python stream.py book.txt -o book-glyphs.txt [--font akshar.ttf] [--lang Deva]
+#        cat book.txt | python stream.py > book-glyphs.txt
+#        python stream.py book.txt -o book-glyphs.txt --cache wordcache.db
+#
+
+import argparse
+import contextlib
+import io
+import sys
+import time
+import converter
+import wordcache
+
+
+def main():
+    parser = argparse.ArgumentParser(description="convert unicode text to an Affinity glyph string")
+    parser.add_argument("infile", nargs="?", help="text file, default standard input")
+    parser.add_argument("-o", "--outfile", help="glyph string file, default standard output")
+    parser.add_argument("--font", default="akshar.ttf")
+    parser.add_argument("--font-number", type=int, default=0)
+    parser.add_argument("--lang", default="Deva", choices=sorted(converter.LANGUAGES))
+    parser.add_argument("--chunk", type=int, default=65536, help="chars read at a time")
+    parser.add_argument("--cache", help="word cache file kept between runs, see wordcache.py")
+    args = parser.parse_args()
+
+    try:
+        ft = converter.load_font(args.font, args.lang, fontNumber=args.font_number,
+                                 xmlFile=None, verbose=False)
+    except ValueError:
+        print("GSUB not found in font file, quitting!", file=sys.stderr)
+        return 1
+
+    # newline="" keeps CR and LF as they are, like the window does. Files
+    # opened here are closed even when the conversion fails, so the output
+    # written so far is flushed; standard input and output are left open.
+    cache = wordcache.WordCache(args.cache) if args.cache else None
+    with contextlib.ExitStack() as files:
+        if args.infile:
+            infile = files.enter_context(open(args.infile, encoding="utf-8", newline=""))
+        else:
+            infile = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", newline="")
+        if args.outfile:
+            outfile = files.enter_context(open(args.outfile, "w", encoding="utf-8", newline=""))
+        else:
+            outfile = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8", newline="")
+
+        start = time.time()
+        converter.convert_stream(infile, outfile, ft, args.chunk, cache)
+        outfile.flush()
+    print("conversion done in", round(time.time() - start, 2), "s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
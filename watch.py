@@ -0,0 +1,160 @@
+# Clipboard watch mode, converts without the window.
+#
+# Keeps the font loaded and looks at the clipboard every interval. When
+# new text with chars of the language is copied, say from Word, it is
+# converted and the glyph string is put back on the clipboard, ready to
+# paste into Affinity. The text must stay the same for the debounce time
+# before it is converted, and the glyph strings written by the watcher
+# itself are never converted again.
+#
+# Usage: python watch.py [--font akshar.ttf] [--lang Deva] [--interval 0.1]
+#                        [--debounce 0.1] [--cache wordcache.db]
+#        python watch.py --selftest   (runs against an in-memory clipboard)
+#
+
+import argparse
+import re
+import sys
+import threading
+import time
+import converter
+import wordcache
+
+
+# clipboard stand-in with the paste() and copy() of the clipboard module,
+# for trying the watcher without a desktop
+class MemoryClipboard:
+
+    def __init__(self, text=""):
+        self.text = text
+        self.writes = 0
+
+    def paste(self):
+        return self.text
+
+    def copy(self, text):
+        self.text = text
+        self.writes = self.writes + 1
+
+
+# poll the clipboard until stop is set, backend is the clipboard module or
+# anything with its paste() and copy(). Returns the number of conversions.
+def watch(ft, backend, interval=0.1, debounce=0.1, cache=None, stop=None, verbose=True):
+    scriptRE = re.compile("[" + chr(ft.uniRange[0]) + "-" + chr(ft.uniRange[1]) + "]")
+    if stop is None:
+        stop = threading.Event()
+
+    seen = backend.paste()  # what is on the clipboard at the start is left alone
+    changedAt = None  # when the clipboard last changed, None once handled
+    written = None  # last glyph string put on the clipboard by us
+    conversions = 0
+    while not stop.is_set():
+        text = backend.paste()
+        now = time.monotonic()
+        if text != seen:
+            seen = text
+            changedAt = now
+        elif changedAt is not None and now - changedAt >= debounce:
+            changedAt = None
+            if text != written and scriptRE.search(text):
+                start = time.perf_counter()
+                written = converter.convert_text(text, ft, cache)
+                backend.copy(written)
+                seen = written
+                conversions = conversions + 1
+                if verbose:
+                    print("converted", len(text), "chars in",
+                          round(1000 * (time.perf_counter() - start), 1), "ms")
+        stop.wait(interval)
+    return conversions
+
+
+# a few two-letter words of the language, from its consonants
+def sample_words(ft):
+    codes = converter.LANGUAGES[ft.lang].get("consonant") or range(ft.uniRange[0] + 0x15, ft.uniRange[0] + 0x1d)
+    codes = [c for c in codes if c in ft.cmap][:8]
+    return ["".join(chr(c) for c in codes[k:k + 2]) for k in range(0, len(codes), 2)]
+
+
+# run the watcher on a MemoryClipboard in a thread and check what it does
+def selftest(ft, interval, debounce):
+    words = sample_words(ft)
+    board = MemoryClipboard(words[0] + " already here")
+    stop = threading.Event()
+    result = []
+    watcher = threading.Thread(target=lambda: result.append(watch(ft, board, interval, debounce,
+                                                                   stop=stop, verbose=False)))
+    watcher.start()
+    settle = debounce + 3 * interval
+
+    failures = []
+
+    def check(name, ok):
+        print("ok  " if ok else "FAIL", name)
+        if not ok:
+            failures.append(name)
+
+    time.sleep(settle)
+    check("text on the clipboard at the start is not converted", board.writes == 0)
+
+    text = words[1] + ", " + words[2] + ", mathi"
+    board.text = text
+    time.sleep(settle)
+    check("new script text is converted", board.text == converter.convert_text(text, ft))
+    check("it is converted once", board.writes == 1)
+
+    time.sleep(settle)
+    check("its own glyph string is not converted again", board.writes == 1)
+
+    board.text = "only English text"
+    time.sleep(settle)
+    check("text without script chars is left alone",
+          board.writes == 1 and board.text == "only English text")
+
+    board.text = words[3]
+    time.sleep(interval / 2)
+    board.text = words[0]
+    time.sleep(settle)
+    check("quick copies one after the other are converted once, the last one",
+          board.writes == 2 and board.text == converter.convert_text(words[0], ft))
+
+    stop.set()
+    watcher.join()
+    check("conversions are counted", result == [2])
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="convert unicode text copied to the clipboard")
+    parser.add_argument("--font", default="akshar.ttf")
+    parser.add_argument("--font-number", type=int, default=0)
+    parser.add_argument("--lang", default="Deva", choices=sorted(converter.LANGUAGES))
+    parser.add_argument("--interval", type=float, default=0.1, help="seconds between clipboard checks")
+    parser.add_argument("--debounce", type=float, default=0.1, help="seconds the text must stay the same")
+    parser.add_argument("--cache", help="word cache file kept between runs, see wordcache.py")
+    parser.add_argument("--selftest", action="store_true", help="check the watcher on an in-memory clipboard")
+    args = parser.parse_args()
+
+    try:
+        ft = converter.load_font(args.font, args.lang, fontNumber=args.font_number,
+                                 xmlFile=None, verbose=False)
+    except ValueError:
+        print("GSUB not found in font file, quitting!")
+        return 1
+    converter.convert_text(" ".join(sample_words(ft)), ft)  # first conversion warms up the engine
+
+    if args.selftest:
+        return selftest(ft, args.interval, args.debounce)
+
+    import clipboard
+    cache = wordcache.WordCache(args.cache) if args.cache else None
+    print("watching the clipboard, copy", args.lang, "text to convert it, ctrl-c to stop")
+    try:
+        watch(ft, clipboard, args.interval, args.debounce, cache)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+# Persistent word cache shared across sessions and processes.
+#
+# Every word (the text up to and with its space) comes out of the shaping
+# the same way wherever it is found, so its glyph string is kept in a
+# SQLite file keyed by font hash, font number, engine hash, language and
+# the word. The engine hash covers converter.py, so a change in the
+# shaping code starts a fresh set of words, and the old ones are evicted
+# like any unused word.
+# A new session then starts with the words converted by earlier ones.
+# The file is in WAL mode, so several processes can read it while one
+# writes. The least recently used words are evicted when it grows past
+# maxWords.
+#
+# Usage: python wordcache.py stats wordcache.db
+#        python wordcache.py clear wordcache.db
+#
+# Bump CACHE_VERSION after changing the tables or the keys of the file,
+# the old words are dropped when the file is opened.
+#
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+import time
+import converter
+
+CACHE_VERSION = 2
+BATCH = 500  # words per query, below the SQLite parameter limit
+
+
+class WordCache:
+
+    def __init__(self, path, maxWords=200000):
+        self.path = path
+        self.maxWords = maxWords
+        self.local = threading.local()  # one connection per thread
+        self.fontKeys = {}  # (font file, font number, language) -> font key
+        db = self.connect()
+        with db:
+            if db.execute("PRAGMA user_version").fetchone()[0] != CACHE_VERSION:
+                db.execute("DROP TABLE IF EXISTS words")
+                db.execute("DROP TABLE IF EXISTS stats")
+                db.execute("PRAGMA user_version = %d" % CACHE_VERSION)
+            db.execute("CREATE TABLE IF NOT EXISTS words (font TEXT, lang TEXT, word TEXT, glyphs TEXT, "
+                       "used INTEGER, PRIMARY KEY (font, lang, word)) WITHOUT ROWID")
+            db.execute("CREATE INDEX IF NOT EXISTS words_used ON words (used)")
+            db.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER)")
+
+    def connect(self):
+        db = getattr(self.local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self.local.db = db
+        return db
+
+    def font_key(self, ft):
+        key = (ft.fontFile, ft.fontNumber, ft.lang)
+        if key not in self.fontKeys:
+            self.fontKeys[key] = (converter.font_hash(ft.fontFile) + "." + str(ft.fontNumber) + "." +
+                                  engine_hash(ft))
+        return self.fontKeys[key]
+
+    # glyph strings of the words found in the cache, word -> glyphs
+    def get_many(self, ft, words):
+        db = self.connect()
+        font = self.font_key(ft)
+        words = [word for word in words if storable(word)]
+        found = {}
+        for k in range(0, len(words), BATCH):
+            batch = words[k:k + BATCH]
+            rows = db.execute("SELECT word, glyphs FROM words WHERE font = ? AND lang = ? AND word IN (%s)"
+                              % ",".join("?" * len(batch)), [font, ft.lang] + batch)
+            found.update(rows)
+        return found
+
+    # store the newly converted words, mark the found ones as used and
+    # count both, all in one write
+    def put_many(self, ft, newWords, usedWords):
+        db = self.connect()
+        font = self.font_key(ft)
+        now = int(time.time())
+        newWords = dict((word, glyphs) for word, glyphs in newWords.items() if storable(word))
+        usedWords = list(usedWords)
+        with db:
+            db.executemany("INSERT OR REPLACE INTO words VALUES (?, ?, ?, ?, ?)",
+                           [(font, ft.lang, word, glyphs, now) for word, glyphs in newWords.items()])
+            for k in range(0, len(usedWords), BATCH):
+                batch = usedWords[k:k + BATCH]
+                db.execute("UPDATE words SET used = ? WHERE font = ? AND lang = ? AND word IN (%s)"
+                           % ",".join("?" * len(batch)), [now, font, ft.lang] + batch)
+            self.count(db, "hits", len(usedWords))
+            self.count(db, "misses", len(newWords))
+            if newWords:
+                self.evict(db)
+
+    # drop the least recently used words down to 90% of maxWords
+    def evict(self, db):
+        total = db.execute("SELECT count(*) FROM words").fetchone()[0]
+        if total <= self.maxWords:
+            return
+        drop = total - self.maxWords * 9 // 10
+        db.execute("DELETE FROM words WHERE (font, lang, word) IN "
+                   "(SELECT font, lang, word FROM words ORDER BY used LIMIT ?)", (drop,))
+        self.count(db, "evicted", drop)
+
+    def count(self, db, name, n):
+        if n:
+            db.execute("INSERT INTO stats VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + ?",
+                       (name, n, n))
+
+    def stats(self):
+        db = self.connect()
+        info = dict(db.execute("SELECT name, value FROM stats"))
+        info["words"] = db.execute("SELECT count(*) FROM words").fetchone()[0]
+        info["fonts"] = db.execute("SELECT font, lang, count(*) FROM words GROUP BY font, lang").fetchall()
+        info["bytes"] = os.path.getsize(self.path)
+        return info
+
+    def clear(self):
+        db = self.connect()
+        with db:
+            db.execute("DELETE FROM words")
+            db.execute("DELETE FROM stats")
+        db.execute("VACUUM")
+
+
+# hash of what the glyph strings depend on besides the font: the shaping code
+def engine_hash(ft):
+    h = hashlib.sha1()
+    with open(converter.__file__, "rb") as f:
+        h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+# SQLite keeps the words as UTF-8, a word with a lone surrogate can't be
+# stored and is converted every time
+def storable(word):
+    try:
+        word.encode("utf-8")
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="show or clear a word cache file")
+    parser.add_argument("command", choices=["stats", "clear"])
+    parser.add_argument("cacheFile")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.cacheFile):
+        print("no cache file", args.cacheFile)
+        return 1
+    cache = WordCache(args.cacheFile)
+    if args.command == "clear":
+        cache.clear()
+        print("cache cleared")
+        return 0
+
+    info = cache.stats()
+    hits = info.get("hits", 0)
+    misses = info.get("misses", 0)
+    print("words =", info["words"], " file size =", info["bytes"], "bytes")
+    for font, lang, n in info["fonts"]:
+        print("  font", font, lang, "words =", n)
+    print("hits =", hits, " misses =", misses, " evicted =", info.get("evicted", 0))
+    if hits + misses:
+        print("hit rate =", round(100.0 * hits / (hits + misses), 1), "%")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())